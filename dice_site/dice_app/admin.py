@@ -1,12 +1,20 @@
-from abc import ABC
+from abc import ABC, abstractmethod
 import datetime
 
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.admin import AdminSite
 from django.contrib.auth.models import Group, User
 from django.contrib.auth.admin import GroupAdmin, UserAdmin
+from django.core.cache import cache
+from django.template.response import TemplateResponse
+from django.urls import path
 
-from .models import City, Address, Systems, Master, Room, Game, Profile
+from .forms import GameAdminForm
+from .models import City, Address, Systems, Master, Room, Game, ArchivedGame, Profile, Booking, ArchivedBooking
+from .performance import histogram
+from .routers import replica_reads, render_with_replica_reads
+from .versions import get_model_version_key, get_version
 
 
 class ArchiveGameFilter(admin.SimpleListFilter, ABC):
@@ -41,6 +49,127 @@ class ArchiveGameFilter(admin.SimpleListFilter, ABC):
             return queryset
 
 
+def parse_search_datetime(search_term):
+    parts = search_term.split()
+    if not parts or len(parts) > 2:
+        return None, None
+    for date_format in ('%d.%m.%Y', '%Y-%m-%d'):
+        try:
+            date = datetime.datetime.strptime(parts[0], date_format).date()
+            break
+        except ValueError:
+            continue
+    else:
+        return None, None
+    time = None
+    if len(parts) == 2:
+        try:
+            time = datetime.datetime.strptime(parts[1], '%H:%M').time()
+        except ValueError:
+            return None, None
+    return date, time
+
+
+class CachedChoicesFilter(admin.SimpleListFilter, ABC):
+    cache_timeout = 300
+    choices_model = None
+
+    @abstractmethod
+    def get_choices(self):
+        pass
+
+    def lookups(self, request, model_admin):
+        version = get_version(get_model_version_key(self.choices_model))
+        key = 'admin_filter:%s:%s:%s' % (model_admin.opts.label_lower, self.parameter_name, version)
+        choices = cache.get(key)
+        if choices is None:
+            choices = list(self.get_choices())
+            cache.set(key, choices, self.cache_timeout)
+        return choices
+
+
+class SeatsGameFilter(admin.SimpleListFilter, ABC):
+    title = "Места"
+    parameter_name = 'seats'
+
+    def lookups(self, request, model_admin):
+        seats = [
+            ('free', 'Есть места'),
+            ('almost_full', 'Почти заполнено'),
+            ('full', 'Мест нет'),
+            ('empty', 'Нет записей'),
+        ]
+        return seats
+
+    def queryset(self, request, queryset):
+        if self.value() == 'free':
+            return queryset.filter(free_seats__gt=0)
+        if self.value() == 'almost_full':
+            return queryset.almost_full()
+        if self.value() == 'full':
+            return queryset.filter(free_seats=0)
+        if self.value() == 'empty':
+            return queryset.filter(filled_seats=0)
+        return queryset
+
+
+class TypeGameFilter(CachedChoicesFilter):
+    title = "Тип сессии"
+    parameter_name = 'type_game'
+    choices_model = Game
+
+    def get_choices(self):
+        types = Game.objects.order_by('type_game').values_list('type_game', flat=True).distinct()
+        return [(type_game, type_game) for type_game in types]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(type_game=self.value())
+        return queryset
+
+
+class RoomGameFilter(CachedChoicesFilter):
+    title = "Комната"
+    parameter_name = 'room'
+    choices_model = Room
+
+    def get_choices(self):
+        return [(str(pk), name) for pk, name in Room.objects.values_list('id', 'name')]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(room_id=self.value())
+        return queryset
+
+
+class CityGameFilter(CachedChoicesFilter):
+    title = "Город"
+    parameter_name = 'city'
+    choices_model = City
+
+    def get_choices(self):
+        return [(str(pk), city) for pk, city in City.objects.values_list('id', 'city')]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(room__city_id=self.value())
+        return queryset
+
+
+class AddressGameFilter(CachedChoicesFilter):
+    title = "Адрес"
+    parameter_name = 'address'
+    choices_model = Address
+
+    def get_choices(self):
+        return [(str(pk), address) for pk, address in Address.objects.values_list('id', 'address')]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(room__address_id=self.value())
+        return queryset
+
+
 class MyAdminSite(AdminSite):
 
     def get_app_list(self, request, **kwargs):
@@ -48,6 +177,21 @@ class MyAdminSite(AdminSite):
         app_list = sorted(app_dict.values(), key=lambda x: x['name'])
         return app_list
 
+    def get_urls(self):
+        urls = [
+            path('performance/', self.admin_view(self.performance_view), name='performance'),
+        ]
+        return urls + super().get_urls()
+
+    def performance_view(self, request):
+        context = {
+            **self.each_context(request),
+            'title': 'Производительность',
+            'enabled': bool(settings.PERFORMANCE_INSTRUMENTATION),
+            'rows': histogram.summary(),
+        }
+        return TemplateResponse(request, 'admin/performance.html', context)
+
 
 class CityAdmin(admin.ModelAdmin):
     list_display = ("city", "get_close")
@@ -65,8 +209,9 @@ class CityAdmin(admin.ModelAdmin):
 
 class AddressAdmin(admin.ModelAdmin):
     list_display = ("get_full_address", "get_close")
+    list_select_related = ("city", )
     search_fields = ["address", "city__city"]
-    list_filter = ("city__city", "close")
+    list_filter = ("city", "close")
 
     def get_full_address(self, obj):
         return str(obj.city) + ", " + str(obj.address)
@@ -83,8 +228,9 @@ class AddressAdmin(admin.ModelAdmin):
 
 class RoomAdmin(admin.ModelAdmin):
     list_display = ("name", "get_full_address", "get_close")
+    list_select_related = ("city", "address")
     search_fields = ["name", "city__city", "address__address"]
-    list_filter = ("city__city",  "address__address", "close")
+    list_filter = ("city", "address", "close")
 
     def get_full_address(self, obj):
         return str(obj.city) + ", " + str(obj.address)
@@ -108,8 +254,9 @@ class SystemsAdmin(admin.ModelAdmin):
 
 class MasterAdmin(admin.ModelAdmin):
     list_display = ("get_fullname", "city", "get_job")
+    list_select_related = ("city", )
     search_fields = ["name", "last_name", "city__city"]
-    list_filter = ("city__city", "on_holiday", "fired")
+    list_filter = ("city", "on_holiday", "fired")
 
     def get_fullname(self, obj):
         return str(obj.name) + " " + str(obj.last_name)
@@ -127,13 +274,25 @@ class MasterAdmin(admin.ModelAdmin):
 
 
 class GameAdmin(admin.ModelAdmin):
+    form = GameAdminForm
     list_display = ("name", "get_system_and_type", "date", "time", "room", "master", "price", "total_seats",
                     "filled_seats", "get_state")
-    list_filter = (ArchiveGameFilter, "filled_seats", "type_game", "system", "room__name",
-                   "room__city__city", "room__address__address", "canceled")
-    list_editable = ("filled_seats", )
+    list_select_related = ("system", "room__address", "master")
+    list_filter = (ArchiveGameFilter, SeatsGameFilter, TypeGameFilter, "system", RoomGameFilter, CityGameFilter,
+                   AddressGameFilter, "canceled")
+    readonly_fields = ("filled_seats", )
     search_fields = ["name", "room__name", "room__city__city", "room__address__address", "master__name",
-                     "master__last_name", "date", "time", "type_game", "system__system"]
+                     "master__last_name", "type_game", "system__system"]
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        date, time = parse_search_datetime(search_term)
+        if date:
+            queryset = queryset.filter(date=date)
+            if time:
+                queryset = queryset.filter(time=time)
+            return queryset, False
+        return super().get_search_results(request, queryset, search_term)
 
     def get_system_and_type(self, obj):
         return str(obj.system) + "(" + str(obj.type_game) + ")"
@@ -150,13 +309,74 @@ class GameAdmin(admin.ModelAdmin):
     get_state.short_description = "Состояние"
 
 
+class ReplicaChangeListMixin:
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method != 'GET':
+            return super().changelist_view(request, extra_context)
+        with replica_reads():
+            return render_with_replica_reads(super().changelist_view(request, extra_context))
+
+
+class ArchivedGameAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
+    list_display = ("name", "get_system_and_type", "date", "time", "room", "master", "price", "total_seats",
+                    "filled_seats", "canceled")
+    list_select_related = ("system", "room__address", "master")
+    list_filter = ("canceled", "system")
+    search_fields = ["name", "master__name", "master__last_name", "system__system"]
+    date_hierarchy = "date"
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_system_and_type(self, obj):
+        return str(obj.system) + "(" + str(obj.type_game) + ")"
+
+    get_system_and_type.short_description = "Тип игры"
+
+
+class BookingAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
+    list_display = ("game", "profile", "status", "updated_at")
+    list_filter = ("status", )
+    search_fields = ["game__name", "profile__user__username"]
+    list_select_related = ("game", "profile__user")
+    raw_id_fields = ("game", "profile")
+
+
+class ArchivedBookingAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
+    list_display = ("game", "profile", "status", "updated_at")
+    list_filter = ("status", )
+    search_fields = ["game__name", "profile__user__username"]
+    list_select_related = ("game", "profile__user")
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 admin.site = MyAdminSite()
 admin.site.register(Group, GroupAdmin)
 admin.site.register(User, UserAdmin)
 admin.site.register(Game, GameAdmin)
+admin.site.register(ArchivedGame, ArchivedGameAdmin)
 admin.site.register(Master, MasterAdmin)
 admin.site.register(Systems, SystemsAdmin)
 admin.site.register(City, CityAdmin)
 admin.site.register(Address, AddressAdmin)
 admin.site.register(Room, RoomAdmin)
 admin.site.register(Profile)
+admin.site.register(Booking, BookingAdmin)
+admin.site.register(ArchivedBooking, ArchivedBookingAdmin)
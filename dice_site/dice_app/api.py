@@ -0,0 +1,143 @@
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from .models import City, Room, Systems, Master, Game
+
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200
+
+encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+class ApiResource:
+
+    def __init__(self, queryset, fields, ordering=('id',), filters=None, media_fields=(), default_filters=None):
+        self.queryset = queryset
+        self.fields = fields
+        self.ordering = ordering
+        self.filters = filters or {}
+        self.media_fields = media_fields
+        self.default_filters = default_filters or {}
+
+    def get_queryset(self):
+        return self.queryset().order_by(*[self.fields[name] for name in self.ordering])
+
+    def get_field_names(self, fields):
+        if not fields:
+            return list(self.fields)
+        names = list(dict.fromkeys(name.strip() for name in fields.split(',') if name.strip()))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ValueError('Неизвестные поля: %s' % ', '.join(unknown))
+        return names
+
+    def filter(self, queryset, params):
+        params = {**{name: default() for name, default in self.default_filters.items()}, **params.dict()}
+        for name, (lookup, parse) in self.filters.items():
+            value = params.get(name)
+            if value not in (None, ''):
+                try:
+                    queryset = queryset.filter(**{lookup: parse(value)})
+                except (TypeError, ValueError):
+                    raise ValueError('Некорректное значение фильтра %s' % name)
+        return queryset
+
+    def encode_cursor(self, row):
+        return base64.urlsafe_b64encode(encoder.encode(row).encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            model = self.queryset().model
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [model._meta.get_field(self.fields[name]).to_python(value)
+                    for name, value in zip(self.ordering, values)]
+        except (ValueError, TypeError, ValidationError):
+            raise ValueError('Некорректный курсор')
+
+    def after_cursor(self, values):
+        condition = None
+        for name, value in reversed(list(zip(self.ordering, values))):
+            path = self.fields[name]
+            greater = Q(**{path + '__gt': value})
+            condition = greater if condition is None else greater | Q(**{path: value}) & condition
+        return condition
+
+    def get_page(self, params):
+        names = self.get_field_names(params.get('fields'))
+        try:
+            limit = min(int(params.get('limit', API_PAGE_SIZE)), API_MAX_PAGE_SIZE)
+        except ValueError:
+            raise ValueError('Некорректный limit')
+        if limit < 1:
+            raise ValueError('Некорректный limit')
+        queryset = self.filter(self.get_queryset(), params)
+        if params.get('cursor'):
+            queryset = queryset.filter(self.after_cursor(self.decode_cursor(params['cursor'])))
+        columns = list(dict.fromkeys([*names, *self.ordering]))
+        rows = list(queryset.values_list(*[self.fields[name] for name in columns])[:limit + 1])
+        return rows, names, columns, limit
+
+    def serialize(self, rows, names, columns, limit):
+        positions = [columns.index(name) for name in names]
+        media = [index for index, name in enumerate(names) if name in self.media_fields]
+        ordering = [columns.index(name) for name in self.ordering]
+        last = cursor = None
+        yield '{"results":['
+        for index, row in enumerate(rows):
+            if index == limit:
+                cursor = self.encode_cursor([last[position] for position in ordering])
+                break
+            values = [row[position] for position in positions]
+            for position in media:
+                values[position] = default_storage.url(values[position]) if values[position] else None
+            yield (',' if index else '') + encoder.encode(dict(zip(names, values)))
+            last = row
+        yield '],"next":%s}' % encoder.encode(cursor)
+
+
+def parse_date(value):
+    return datetime.date.fromisoformat(value)
+
+
+RESOURCES = {
+    'cities': ApiResource(
+        lambda: City.objects.filter(close=False),
+        {'id': 'id', 'city': 'city'}),
+    'systems': ApiResource(
+        Systems.objects.all,
+        {'id': 'id', 'system': 'system', 'description': 'description', 'difficulty_level': 'difficulty_level',
+         'image': 'image', 'icon': 'icon'},
+        media_fields={'image', 'icon'}),
+    'rooms': ApiResource(
+        lambda: Room.objects.filter(close=False),
+        {'id': 'id', 'name': 'name', 'city': 'city_id', 'address': 'address__address', 'photo': 'photo',
+         'icon': 'icon'},
+        filters={'city': ('city_id', int)},
+        media_fields={'photo', 'icon'}),
+    'masters': ApiResource(
+        lambda: Master.objects.filter(fired=False),
+        {'id': 'id', 'name': 'name', 'last_name': 'last_name', 'description': 'description', 'photo': 'photo',
+         'city': 'city_id', 'on_holiday': 'on_holiday'},
+        filters={'city': ('city_id', int)},
+        media_fields={'photo'}),
+    'games': ApiResource(
+        lambda: Game.objects.filter(canceled=False),
+        {'id': 'id', 'name': 'name', 'type_game': 'type_game', 'description': 'description', 'image': 'image',
+         'price': 'price', 'date': 'date', 'time': 'time', 'duration': 'duration', 'total_seats': 'total_seats',
+         'filled_seats': 'filled_seats', 'free_seats': 'free_seats', 'system': 'system_id', 'master': 'master_id',
+         'room': 'room_id', 'city': 'room__city_id'},
+        ordering=('date', 'time', 'id'),
+        filters={'city': ('room__city_id', int), 'room': ('room_id', int), 'master': ('master_id', int),
+                 'system': ('system_id', int), 'date_from': ('date__gte', parse_date),
+                 'date_to': ('date__lte', parse_date), 'free_seats': ('free_seats__gte', int)},
+        media_fields={'image'},
+        default_filters={'date_from': lambda: datetime.date.today().isoformat()}),
+}
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DiceAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dice_app'
+
+    def ready(self):
+        from . import checks, signals
@@ -0,0 +1,55 @@
+import datetime
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+
+from .models import Game, ArchivedGame, Booking, ArchivedBooking
+from .schedule import refresh_schedule_days
+from .signals import invalidate_game_schedule, update_game_schedule_days
+
+ARCHIVE_FIELDS = [field.attname for field in ArchivedGame._meta.concrete_fields
+                  if field.name not in ('id', 'original_id', 'archived_at')]
+SCHEDULE_RECEIVERS = (invalidate_game_schedule, update_game_schedule_days)
+
+
+@contextmanager
+def schedule_receivers_disconnected():
+    for receiver in SCHEDULE_RECEIVERS:
+        post_delete.disconnect(receiver, sender=Game)
+    try:
+        yield
+    finally:
+        for receiver in SCHEDULE_RECEIVERS:
+            post_delete.connect(receiver, sender=Game)
+
+
+def archive_bookings(game_ids):
+    archived_ids = dict(ArchivedGame.objects.filter(original_id__in=game_ids).values_list('original_id', 'id'))
+    ArchivedBooking.objects.bulk_create([
+        ArchivedBooking(profile_id=booking.profile_id, game_id=archived_ids[booking.game_id], status=booking.status,
+                        created_at=booking.created_at, updated_at=booking.updated_at)
+        for booking in Booking.objects.filter(game_id__in=game_ids).order_by('id')])
+
+
+def archive_games(days, batch_size=500):
+    border = datetime.date.today() - datetime.timedelta(days=days)
+    archived = 0
+    schedule_days = set()
+    try:
+        with schedule_receivers_disconnected():
+            while True:
+                with transaction.atomic():
+                    games = list(Game.objects.select_for_update().filter(date__lt=border).order_by('id')[:batch_size])
+                    if not games:
+                        return archived
+                    game_ids = [game.id for game in games]
+                    schedule_days.update(Game.objects.filter(pk__in=game_ids).values_list('room__city_id', 'date'))
+                    ArchivedGame.objects.bulk_create([
+                        ArchivedGame(original_id=game.id, **{field: getattr(game, field) for field in ARCHIVE_FIELDS})
+                        for game in games])
+                    archive_bookings(game_ids)
+                    Game.objects.filter(pk__in=game_ids).delete()
+                archived += len(games)
+    finally:
+        refresh_schedule_days(*schedule_days)
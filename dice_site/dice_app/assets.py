@@ -0,0 +1,79 @@
+import gzip
+import re
+
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BUNDLES = {
+    'css/site.bundle.css': [
+        ('css/login.css', None),
+        ('css/header.css', None),
+        ('css/record.css', None),
+        ('css/profile.css', None),
+        ('css/base.css', None),
+        ('css/base_styles_tablet.css', 'screen and (max-width: 1024px)'),
+        ('css/base_styles_mobile.css', 'screen and (max-width: 767px)'),
+        ('css/owl.carousel.min.css', None),
+        ('css/owl.theme.default.min.css', None),
+    ],
+    'js/site.bundle.js': [
+        ('js/main.js', None),
+        ('js/owl.carousel.min.js', None),
+    ],
+}
+COMPRESSED_EXTENSIONS = ('.css', '.js', '.svg', '.ttf', '.json', '.txt')
+MIN_COMPRESSED_SIZE = 256
+FONT_UNICODES = [*range(0x20, 0x100), *range(0x400, 0x500), *range(0x2010, 0x2070), 0x2116, 0x20b8]
+
+STRING_RE = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''')
+
+
+def minify_css(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    parts = STRING_RE.split(css)
+    for index in range(0, len(parts), 2):
+        part = re.sub(r'\s+', ' ', parts[index])
+        part = re.sub(r'\s*([{};,>])\s*', r'\1', part)
+        parts[index] = re.sub(r':\s+', ':', part)
+    return ''.join(parts).replace(';}', '}').strip()
+
+
+def minify_js(js):
+    lines = (line.strip() for line in js.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+
+def build_bundle(name, sources, read):
+    if name.endswith('.css'):
+        parts = []
+        for path, media in sources:
+            css = minify_css(read(path))
+            parts.append('@media %s{%s}' % (media, css) if media else css)
+        return '\n'.join(parts)
+    return ';\n'.join(minify_js(read(path)) for path, _ in sources)
+
+
+def compress(storage, name):
+    with storage.open(name) as file:
+        content = file.read()
+    if len(content) < MIN_COMPRESSED_SIZE:
+        return
+    variants = {'.gz': gzip.compress(content, 9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content, quality=11)
+    for extension, compressed in variants.items():
+        if len(compressed) < len(content):
+            if storage.exists(name + extension):
+                storage.delete(name + extension)
+            storage.save(name + extension, ContentFile(compressed))
+
+
+def get_used_icons(texts):
+    icons = set()
+    for text in texts:
+        icons.update(int(code, 16) for code in re.findall(r'(?:\\|&#x)(f[0-9a-fA-F]{3})\b', text))
+    return icons
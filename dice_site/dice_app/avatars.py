@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+
+from .versions import get_version, bump_versions
+
+AVATARS_VERSION_KEY = 'avatars_version'
+
+_catalog = {'stamp': None, 'urls': []}
+
+
+def build_avatar_catalog():
+    try:
+        _, filenames = default_storage.listdir(settings.AVATAR_FOLDER)
+    except FileNotFoundError:
+        return []
+    return [default_storage.url(settings.AVATAR_FOLDER + filename)
+            for filename in sorted(filenames) if filename.endswith('.png')]
+
+
+def get_avatar_folder_mtime():
+    try:
+        return default_storage.get_modified_time(settings.AVATAR_FOLDER).timestamp()
+    except (NotImplementedError, OSError):
+        return None
+
+
+def get_avatar_urls():
+    stamp = (get_version(AVATARS_VERSION_KEY), get_avatar_folder_mtime())
+    if _catalog['stamp'] != stamp:
+        key = 'avatars:%s:%s' % stamp
+        urls = cache.get(key)
+        if urls is None:
+            urls = build_avatar_catalog()
+            cache.set(key, urls, None)
+        _catalog['urls'] = urls
+        _catalog['stamp'] = stamp
+    return _catalog['urls']
+
+
+def refresh_avatar_catalog():
+    bump_versions(AVATARS_VERSION_KEY)
+    return get_avatar_urls()
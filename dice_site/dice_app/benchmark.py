@@ -0,0 +1,244 @@
+import datetime
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, connections, close_old_connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from .models import City, Address, Room, Systems, Master, Game, Profile
+from .routers import primary_reads
+from .schedule import rebuild_schedule_days
+from .search import update_search_documents
+
+BENCHMARK_CACHE = 'benchmark'
+
+QUERY_BUDGETS = {
+    'records': 4,
+    'records_search': 4,
+    'records_more': 4,
+    'profile': 5,
+    'change_password': 5,
+    'admin_game': 10,
+    'admin_room': 8,
+    'admin_address': 8,
+    'admin_master': 8,
+}
+
+
+def benchmark_cache():
+    return override_settings(CACHES={**settings.CACHES, 'default': settings.CACHES[BENCHMARK_CACHE]})
+
+
+@contextmanager
+def benchmark_environment():
+    with benchmark_cache(), primary_reads():
+        yield
+
+
+def seed_users(users=1000):
+    password = make_password(None)
+    created = User.objects.bulk_create([
+        User(username='benchmark%s' % number, email='benchmark%s@dice.kz' % number, password=password)
+        for number in range(users)], batch_size=1000)
+    if not created[0].pk:
+        created = list(User.objects.filter(username__startswith='benchmark'))
+    Profile.objects.bulk_create([Profile(user=user) for user in created], batch_size=1000)
+    return created[0]
+
+
+def seed(cities=10, rooms=5, masters=10, games=10000, days=730):
+    systems = Systems.objects.bulk_create([
+        Systems(system='Система %s' % number, description='Описание', image='systems/image/system.png')
+        for number in range(10)])
+    all_rooms = []
+    all_masters = []
+    for city_number in range(cities):
+        city = City.objects.create(city='Город %s' % city_number)
+        address = Address.objects.create(city=city, address='Адрес %s' % city_number)
+        all_rooms += Room.objects.bulk_create([
+            Room(name='Зал %s-%s' % (city_number, number), city=city, address=address, photo='room/photo/room.png')
+            for number in range(rooms)])
+        all_masters += Master.objects.bulk_create([
+            Master(name='Мастер', last_name='%s-%s' % (city_number, number), description='Описание',
+                   photo='master/photo/master.png', city=city)
+            for number in range(masters)])
+    first_day = datetime.date.today() - datetime.timedelta(days=days // 2)
+    Game.objects.bulk_create([
+        Game(name='Игра %s' % number, system=random.choice(systems), description='Описание',
+             image='game/image/game.png', master=random.choice(all_masters), room=random.choice(all_rooms),
+             date=first_day + datetime.timedelta(days=random.randrange(days)),
+             time=datetime.time(random.randrange(10, 22)), canceled=random.random() < 0.05)
+        for number in range(games)], batch_size=1000)
+    update_search_documents(Game.objects.all())
+    rebuild_schedule_days()
+
+
+def get_scenarios():
+    game_query = Game.objects.filter(date__gte=datetime.date.today()).order_by('-date').values_list('name', flat=True)
+    return {
+        'records': (reverse('records'), {}, False),
+        'records_search': (reverse('records'), {'search_query': game_query.first() or ''}, False),
+        'records_more': (reverse('records_more'), {'cursor': '%s_00:00:00_0' % datetime.date.today()}, False),
+        'profile': (reverse('profile'), {}, True),
+        'change_password': (reverse('change_password'), {}, True),
+        'admin_game': (reverse('admin:dice_app_game_changelist'), {}, True),
+        'admin_room': (reverse('admin:dice_app_room_changelist'), {}, True),
+        'admin_address': (reverse('admin:dice_app_address_changelist'), {}, True),
+        'admin_master': (reverse('admin:dice_app_master_changelist'), {}, True),
+    }
+
+
+def run_benchmarks(user, repeat=5):
+    user.is_staff = user.is_superuser = True
+    user.save()
+    anonymous = Client()
+    logged_in = Client()
+    logged_in.force_login(user)
+    city_id = min(City.objects.filter(close=False).values_list('id', flat=True))
+    results = {}
+    with benchmark_environment():
+        for name, (url, params, login_required) in get_scenarios().items():
+            client = logged_in if login_required else anonymous
+            client.cookies['selected_city'] = city_id
+            timings = []
+            for _ in range(repeat):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = client.get(url, params)
+                    wall_time = time.perf_counter() - start
+                timings.append(wall_time)
+            results[name] = {
+                'status': response.status_code,
+                'queries': len(queries),
+                'sql_ms': round(sum(float(query['time']) for query in queries) * 1000, 2),
+                'wall_ms': round(statistics.median(timings) * 1000, 2),
+            }
+    return results
+
+
+def check_budgets(results, budgets=None):
+    budgets = budgets or QUERY_BUDGETS
+    errors = []
+    for name, result in results.items():
+        if result['status'] != 200:
+            errors.append('%s: статус ответа %s' % (name, result['status']))
+        if name in budgets and result['queries'] > budgets[name]:
+            errors.append('%s: %s запросов при бюджете %s' % (name, result['queries'], budgets[name]))
+    return errors
+
+
+def compare_results(previous, results):
+    lines = []
+    for name, result in results.items():
+        before = previous.get(name)
+        if before:
+            lines.append('%s: запросов %s -> %s, SQL %s -> %s мс, время %s -> %s мс' % (
+                name, before['queries'], result['queries'], before['sql_ms'], result['sql_ms'],
+                before['wall_ms'], result['wall_ms']))
+    return lines
+
+
+def dump_results(results, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def run_load(url, concurrency=50, requests=1000, city_id=None, timeout=30):
+    headers = {'Cookie': 'selected_city=%s' % city_id} if city_id else {}
+
+    def fetch(_):
+        start = time.perf_counter()
+        try:
+            with urlopen(Request(url, headers=headers), timeout=timeout) as response:
+                response.read()
+                ok = response.status == 200
+        except OSError:
+            ok = False
+        return ok, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(fetch, range(requests)))
+    elapsed = time.perf_counter() - start
+    percentiles = statistics.quantiles([timing for _, timing in results], n=100, method='inclusive')
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': sum(not ok for ok, _ in results),
+        'rps': round(requests / elapsed, 1),
+        'p50_ms': round(percentiles[49] * 1000, 2),
+        'p95_ms': round(percentiles[94] * 1000, 2),
+    }
+
+
+def run_connection_benchmark(url, requests=200, max_age=60):
+    opened = []
+
+    def count_connection(sender, connection, **kwargs):
+        opened.append(connection.alias)
+
+    for database in connections.all():
+        database.close()
+        database.settings_dict['CONN_MAX_AGE'] = max_age
+    client = Client()
+    timings = []
+    connection_created.connect(count_connection)
+    try:
+        with benchmark_cache():
+            for _ in range(requests):
+                cache.clear()
+                start = time.perf_counter()
+                close_old_connections()
+                response = client.get(url)
+                close_old_connections()
+                timings.append(time.perf_counter() - start)
+    finally:
+        connection_created.disconnect(count_connection)
+        for database in connections.all():
+            database.close()
+    percentiles = statistics.quantiles(timings, n=100, method='inclusive')
+    return {
+        'status': response.status_code,
+        'max_age': max_age,
+        'connections': len(opened),
+        'p50_ms': round(percentiles[49] * 1000, 2),
+        'p95_ms': round(percentiles[94] * 1000, 2),
+    }
+
+
+def run_conditional_benchmark(city_id, requests=200):
+    client = Client()
+    client.cookies['selected_city'] = city_id
+    url = reverse('records')
+    client.get(url)
+    etag = client.get(url)['ETag']
+    results = {}
+    for name, headers in (('full', {}), ('not_modified', {'HTTP_IF_NONE_MATCH': etag})):
+        timings = []
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.get(url, **headers)
+                timings.append(time.perf_counter() - start)
+        percentiles = statistics.quantiles(timings, n=100, method='inclusive')
+        results[name] = {
+            'status': response.status_code,
+            'queries': len(queries),
+            'bytes': len(response.content),
+            'p50_ms': round(percentiles[49] * 1000, 2),
+            'p95_ms': round(percentiles[94] * 1000, 2),
+        }
+    return results
@@ -0,0 +1,59 @@
+import datetime
+
+from django.db import connections, router, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Room, Game, Booking, ScheduleDay
+from .schedule import invalidate_schedule
+
+
+def lock_game(game_id, **filters):
+    if not connections[router.db_for_write(Game)].features.has_select_for_update:
+        Game.objects.filter(pk=game_id).update(filled_seats=F('filled_seats'))
+    games = Game.objects.select_for_update().only('id', 'room_id', 'date', 'canceled', 'filled_seats', 'free_seats')
+    return games.get(pk=game_id, **filters)
+
+
+def invalidate_game(game):
+    free_seats = game.free_seats
+    game.refresh_from_db(fields=['filled_seats', 'free_seats'])
+    city_ids = list(Room.objects.filter(pk=game.room_id).order_by().values_list('city_id', flat=True))
+    if not game.canceled and game.free_seats != free_seats:
+        ScheduleDay.objects.filter(city_id__in=city_ids, date=game.date).update(
+            free_seats=F('free_seats') + (game.free_seats - free_seats))
+    transaction.on_commit(lambda: invalidate_schedule(*city_ids))
+
+
+def book_game(profile, game_id):
+    with transaction.atomic():
+        game = lock_game(game_id, canceled=False, date__gte=datetime.date.today())
+        booking, _ = Booking.objects.get_or_create(profile=profile, game=game, defaults={'status': Booking.CANCELED})
+        if booking.status == Booking.CANCELED:
+            seat_taken = Game.objects.filter(pk=game.pk, filled_seats__lt=F('total_seats')).update(
+                free_seats=Greatest(F('total_seats') - F('filled_seats') - 1, Value(0)),
+                filled_seats=F('filled_seats') + 1, updated_at=timezone.now())
+            booking.status = Booking.BOOKED if seat_taken else Booking.WAITLIST
+            booking.save()
+            invalidate_game(game)
+    return booking
+
+
+def cancel_booking(profile, game_id):
+    with transaction.atomic():
+        game = lock_game(game_id)
+        booking = Booking.objects.get(profile=profile, game=game)
+        if booking.status == Booking.BOOKED:
+            waiting = Booking.objects.filter(game=game, status=Booking.WAITLIST).order_by('updated_at', 'id').first()
+            if waiting:
+                waiting.status = Booking.BOOKED
+                waiting.save()
+            else:
+                Game.objects.filter(pk=game.pk, filled_seats__gt=0).update(
+                    free_seats=Greatest(F('total_seats') - F('filled_seats') + 1, Value(0)),
+                    filled_seats=F('filled_seats') - 1, updated_at=timezone.now())
+                invalidate_game(game)
+        booking.status = Booking.CANCELED
+        booking.save()
+    return booking
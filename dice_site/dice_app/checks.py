@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register()
+def check_persistent_connections(app_configs, **kwargs):
+    errors = []
+    for alias, database in settings.DATABASES.items():
+        if database.get('CONN_MAX_AGE', 0) is None and not database.get('CONN_HEALTH_CHECKS', False):
+            errors.append(Warning(
+                'Бессрочные соединения с базой %s используются без проверки работоспособности' % alias,
+                hint='Включите CONN_HEALTH_CHECKS_DB=1 или задайте CONN_MAX_AGE_DB меньше wait_timeout сервера.',
+                id='dice_app.W001',
+            ))
+    return errors
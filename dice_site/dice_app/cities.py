@@ -0,0 +1,66 @@
+import time
+
+from .models import City
+from .versions import get_version, aget_version, bump_versions
+
+CITIES_VERSION_KEY = 'cities_version'
+CITIES_REGISTRY_TIMEOUT = 60
+
+_registry = {'version': None, 'cities': {}, 'expires': 0}
+
+
+def is_registry_fresh(version):
+    return _registry['version'] == version and _registry['expires'] > time.monotonic()
+
+
+def update_registry(version, cities):
+    _registry['cities'] = cities
+    _registry['version'] = version
+    _registry['expires'] = time.monotonic() + CITIES_REGISTRY_TIMEOUT
+
+
+def get_open_cities():
+    version = get_version(CITIES_VERSION_KEY)
+    if not is_registry_fresh(version):
+        update_registry(version, {city.id: city for city in City.objects.filter(close=False)})
+    return _registry['cities']
+
+
+async def aget_open_cities():
+    version = await aget_version(CITIES_VERSION_KEY)
+    if not is_registry_fresh(version):
+        update_registry(version, {city.id: city async for city in City.objects.filter(close=False).aiterator()})
+    return _registry['cities']
+
+
+def invalidate_cities():
+    bump_versions(CITIES_VERSION_KEY)
+
+
+def select_city(cities, city_id):
+    try:
+        return cities.get(int(city_id))
+    except (TypeError, ValueError):
+        return None
+
+
+def select_default_city(cities):
+    if cities:
+        return cities[min(cities)]
+    return None
+
+
+def get_city(city_id):
+    return select_city(get_open_cities(), city_id)
+
+
+def get_default_city():
+    return select_default_city(get_open_cities())
+
+
+async def aget_city(city_id):
+    return select_city(await aget_open_cities(), city_id)
+
+
+async def aget_default_city():
+    return select_default_city(await aget_open_cities())
@@ -0,0 +1,45 @@
+import datetime
+
+from django.db.models import Q
+
+from .models import Game
+
+CONFLICT_FIELDS = ('room_id', 'master_id')
+
+
+def get_interval(date, time, duration):
+    start = datetime.datetime.combine(date, time)
+    return start, start + datetime.timedelta(minutes=duration)
+
+
+def overlaps(first, second):
+    return first[0] < second[1] and second[0] < first[1]
+
+
+def find_conflicts(game):
+    if game.canceled:
+        return []
+    interval = get_interval(game.date, game.time, game.duration)
+    day = datetime.timedelta(days=1)
+    candidates = Game.objects.filter(Q(room_id=game.room_id) | Q(master_id=game.master_id),
+                                     date__range=(game.date - day, game.date + day), canceled=False)
+    if game.pk:
+        candidates = candidates.exclude(pk=game.pk)
+    candidates = candidates.only('name', 'room_id', 'master_id', 'date', 'time', 'duration').order_by('date', 'time')
+    return [other for other in candidates if overlaps(interval, get_interval(other.date, other.time, other.duration))]
+
+
+def audit_conflicts(field, date_from=None):
+    games = Game.objects.filter(canceled=False).order_by(field, 'date', 'time', 'id')
+    if date_from is not None:
+        games = games.filter(date__gte=date_from - datetime.timedelta(days=1))
+    owner = None
+    active = []
+    for pk, game_owner, date, time, duration in games.values_list('id', field, 'date', 'time', 'duration').iterator():
+        start, end = get_interval(date, time, duration)
+        if game_owner != owner:
+            owner, active = game_owner, []
+        active = [(other_pk, other_end) for other_pk, other_end in active if other_end > start]
+        for other_pk, _ in active:
+            yield owner, other_pk, pk
+        active.append((pk, end))
@@ -1,13 +1,27 @@
 import re
 
 from django import forms
-from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, UserChangeForm, PasswordChangeForm
+from django.contrib.auth.forms import BaseUserCreationForm, AuthenticationForm, UserChangeForm, PasswordChangeForm
 from django.contrib.auth.models import User
+from django.db import IntegrityError, connections, router, transaction
 
-from dice_app.models import Profile
+from dice_app.cities import get_city
+from dice_app.conflicts import find_conflicts
+from dice_app.models import Profile, Game
 
 
-class CustomUserCreationForm(UserCreationForm):
+class CustomUserCreationForm(BaseUserCreationForm):
+    unique_errors = {
+        'email': 'Пользователь с таким email уже существует.',
+        'username': 'Пользователь с таким логином уже существует.',
+    }
+    unique_constraints = {
+        'auth_user_username_ci_unique': 'username',
+        'auth_user_username_key': 'username',
+        'auth_user.username': 'username',
+        'auth_user_email_ci_unique': 'email',
+    }
+
     first_name = forms.CharField(min_length=3, max_length=20,
                                  widget=forms.TextInput(attrs={'placeholder': 'Имя *',
                                                                'pattern': '^[\wа-яёА-ЯЁ]+$',
@@ -38,16 +52,15 @@ class CustomUserCreationForm(UserCreationForm):
         username = self.cleaned_data.get('username')
         if not re.match(r'^(?!_)[a-zA-Z\d_]+(?<!_)$', username):
             raise forms.ValidationError("Только латинские буквы, цифры и символ (_) внутри логина.")
-        if User.objects.filter(username__iexact=username).exists():
-            raise forms.ValidationError('Пользователь с таким логином уже существует.')
         return username
 
     def clean_email(self):
         email = self.cleaned_data.get('email')
         if not re.match(r'[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}$', email):
             raise forms.ValidationError("Формат email (**@**.**).")
-        if User.objects.filter(email=email).exists():
-            raise forms.ValidationError('Пользователь с таким email уже существует.')
+        if not connections[router.db_for_read(User)].features.supports_expression_indexes:
+            if User.objects.filter(email__iexact=email).exists():
+                raise forms.ValidationError(self.unique_errors['email'])
         return email.lower()
 
     def clean_password1(self):
@@ -56,7 +69,36 @@ class CustomUserCreationForm(UserCreationForm):
             raise forms.ValidationError("Только латинские буквы, цифры и специальные символы (!@#$%^&*_).")
         return password1
 
-    class Meta(UserCreationForm.Meta):
+    def validate_unique(self):
+        exclude = self._get_validation_exclusions()
+        exclude.add('username')
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except forms.ValidationError as error:
+            self._update_errors(error)
+
+    def get_unique_error_field(self, error):
+        field = next((field for name, field in self.unique_constraints.items() if name in str(error)), None)
+        if field is None and User.objects.filter(username__iexact=self.cleaned_data['username']).exists():
+            field = 'username'
+        if field is None and User.objects.filter(email__iexact=self.cleaned_data['email']).exists():
+            field = 'email'
+        return field
+
+    def create_user(self):
+        try:
+            with transaction.atomic():
+                user = self.save()
+                Profile.objects.create(user=user)
+        except IntegrityError as error:
+            field = self.get_unique_error_field(error)
+            if field is None:
+                raise
+            self.add_error(field, self.unique_errors[field])
+            return None
+        return user
+
+    class Meta(BaseUserCreationForm.Meta):
         model = User
         fields = ['first_name', 'username', 'password1', 'password2', 'email']
 
@@ -77,6 +119,16 @@ class GameSearchForm(forms.Form):
                                    widget=forms.TextInput(attrs={'placeholder': 'Искать игру...'}))
 
 
+class CitySelectForm(forms.Form):
+    city_id = forms.IntegerField()
+
+    def clean_city_id(self):
+        city = get_city(self.cleaned_data['city_id'])
+        if city is None:
+            raise forms.ValidationError('Выбранный город недоступен, выберите другой.')
+        return city
+
+
 class CustomUserForm(UserChangeForm):
     first_name = forms.CharField(label='Имя', min_length=3, max_length=20,
                                  widget=forms.TextInput(attrs={'pattern': '^[\wа-яёА-ЯЁ]+$',
@@ -111,9 +163,7 @@ class CustomUserForm(UserChangeForm):
         username = self.instance.username
         if not re.match(r'[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}$', email):
             raise forms.ValidationError("Формат email '**@**.**'.")
-        if User.objects.filter(username=username, email=email).exists():
-            return email
-        if User.objects.filter(email=email).exists():
+        if User.objects.filter(email__iexact=email).exclude(username=username).exists():
             raise forms.ValidationError('Пользователь с таким email уже существует.')
         return email
 
@@ -175,3 +225,30 @@ class ChangePasswordForm(PasswordChangeForm):
         if not re.match(r'^[a-zA-Z\d!@#$%^&*_]+$', new_password1):
             raise forms.ValidationError("Только латинские буквы, цифры и специальные символы (!@#$%^&*_).")
         return new_password1
+
+
+class GameAdminForm(forms.ModelForm):
+    conflict_fields = ('room', 'master', 'date', 'time', 'duration')
+
+    class Meta:
+        model = Game
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if any(cleaned_data.get(name) is None for name in self.conflict_fields):
+            return cleaned_data
+        game = Game(pk=self.instance.pk, canceled=cleaned_data.get('canceled', False),
+                    **{name: cleaned_data[name] for name in self.conflict_fields})
+        errors = []
+        for other in find_conflicts(game):
+            reasons = []
+            if other.room_id == game.room_id:
+                reasons.append('та же комната')
+            if other.master_id == game.master_id:
+                reasons.append('тот же мастер')
+            errors.append(forms.ValidationError('Пересекается с игрой «%s» %s в %s: %s.' % (
+                other.name, other.date.strftime('%d.%m.%Y'), other.time.strftime('%H:%M'), ', '.join(reasons))))
+        if errors:
+            raise forms.ValidationError(errors)
+        return cleaned_data
@@ -0,0 +1,11 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+MIN_PBKDF2_ITERATIONS = 310000
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+
+    @property
+    def iterations(self):
+        return max(settings.PASSWORD_ITERATIONS or PBKDF2PasswordHasher.iterations, MIN_PBKDF2_ITERATIONS)
@@ -0,0 +1,93 @@
+import hashlib
+import logging
+import os
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+IMAGE_WIDTHS = (320, 640, 1280)
+IMAGE_FORMATS = {'webp': ('WEBP', {'quality': 80, 'method': 6}),
+                 'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True})}
+DERIVATIVES_FOLDER = 'resized'
+DERIVATIVES_MISS_TIMEOUT = 300
+IMAGE_FIELDS = {
+    'Game': ['image'],
+    'Room': ['photo'],
+    'Master': ['photo'],
+    'Systems': ['image'],
+    'Profile': ['avatars'],
+}
+
+
+def derivative_name(name, width, extension):
+    folder, filename = os.path.split(name)
+    return '%s/%s/%s_%s.%s' % (folder, DERIVATIVES_FOLDER, filename, width, extension)
+
+
+def get_derivatives_key(name):
+    return 'image_derivatives:%s' % hashlib.md5(name.encode()).hexdigest()
+
+
+def get_derivative_widths(name, storage=default_storage):
+    widths = cache.get(get_derivatives_key(name))
+    if widths is None:
+        widths = find_derivatives(name, storage)
+        cache.set(get_derivatives_key(name), widths, None if widths else DERIVATIVES_MISS_TIMEOUT)
+    return widths
+
+
+def record_derivatives(name, widths):
+    cache.set(get_derivatives_key(name), list(widths), None)
+
+
+def find_derivatives(name, storage=default_storage):
+    widths = []
+    for width in IMAGE_WIDTHS:
+        if not all(storage.exists(derivative_name(name, width, extension)) for extension in IMAGE_FORMATS):
+            break
+        widths.append(width)
+    return widths
+
+
+def generate_derivatives(name, storage=default_storage):
+    try:
+        with storage.open(name) as file:
+            original = ImageOps.exif_transpose(Image.open(file))
+            original.load()
+    except (OSError, UnidentifiedImageError):
+        logger.warning('Не удалось открыть изображение %s', name)
+        return False
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA')
+    widths = [width for width in IMAGE_WIDTHS if width <= original.width]
+    for width in widths:
+        image = original.copy()
+        image.thumbnail((width, width * 4), Image.Resampling.LANCZOS)
+        for extension, (image_format, options) in IMAGE_FORMATS.items():
+            result = image
+            if image_format == 'JPEG' and result.mode == 'RGBA':
+                result = Image.new('RGB', image.size, (255, 255, 255))
+                result.paste(image, mask=image.getchannel('A'))
+            buffer = BytesIO()
+            result.save(buffer, image_format, **options)
+            target = derivative_name(name, width, extension)
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(buffer.getvalue()))
+    record_derivatives(name, widths)
+    return True
+
+
+def ensure_derivatives(name, storage=default_storage):
+    if not name or cache.get(get_derivatives_key(name)):
+        return
+    widths = find_derivatives(name, storage)
+    if widths:
+        record_derivatives(name, widths)
+    else:
+        generate_derivatives(name, storage)
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dice_app.archive import archive_games
+
+
+class Command(BaseCommand):
+    help = 'Переносит прошедшие игры старше указанного числа дней в архив'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        archived = archive_games(options['days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Перенесено в архив: %s' % archived))
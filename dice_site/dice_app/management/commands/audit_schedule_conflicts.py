@@ -0,0 +1,31 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dice_app.conflicts import CONFLICT_FIELDS, audit_conflicts
+
+FIELD_LABELS = {'room_id': 'комната', 'master_id': 'мастер'}
+
+
+class Command(BaseCommand):
+    help = 'Ищет игры, которые пересекаются по времени в одной комнате или у одного мастера'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', type=datetime.date.fromisoformat,
+                            help='Проверять игры начиная с даты ГГГГ-ММ-ДД, по умолчанию с сегодняшнего дня')
+        parser.add_argument('--all', action='store_true', help='Проверить всё расписание, включая прошедшие игры')
+
+    def handle(self, *args, **options):
+        date_from = None if options['all'] else options['date_from'] or datetime.date.today()
+        start = time.perf_counter()
+        conflicts = 0
+        for field in CONFLICT_FIELDS:
+            for owner, first_id, second_id in audit_conflicts(field, date_from):
+                conflicts += 1
+                self.stdout.write('%s %s: игры %s и %s пересекаются' % (FIELD_LABELS[field], owner, first_id,
+                                                                      second_id))
+        elapsed = (time.perf_counter() - start) * 1000
+        if conflicts:
+            raise CommandError('Найдено пересечений: %s (%.1f мс)' % (conflicts, elapsed))
+        self.stdout.write(self.style.SUCCESS('Пересечений нет (%.1f мс)' % elapsed))
@@ -0,0 +1,34 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dice_app.benchmark import run_load, dump_results
+
+
+class Command(BaseCommand):
+    help = ('Нагружает запущенные WSGI и ASGI развертывания одинаковым числом параллельных запросов, '
+            'например gunicorn dice_site.wsgi -w 4 и uvicorn dice_site.asgi:application --workers 4')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi-url', help='Адрес страницы в WSGI развертывании')
+        parser.add_argument('--asgi-url', help='Адрес той же страницы в ASGI развертывании')
+        parser.add_argument('--city', type=int, help='Город для cookie selected_city')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--output', default='benchmark_concurrency.json')
+
+    def handle(self, *args, **options):
+        urls = {name: options['%s_url' % name] for name in ('wsgi', 'asgi') if options['%s_url' % name]}
+        if not urls:
+            raise CommandError('Укажите --wsgi-url и/или --asgi-url')
+        if options['requests'] < 2:
+            raise CommandError('Нужно не меньше двух запросов')
+        results = {name: run_load(url, options['concurrency'], options['requests'], options['city'])
+                   for name, url in urls.items()}
+        dump_results(results, options['output'])
+        for name, result in results.items():
+            self.stdout.write('%s: %s' % (name, json.dumps(result)))
+        if len(results) == 2:
+            asgi, wsgi = results['asgi'], results['wsgi']
+            self.stdout.write(self.style.SUCCESS('ASGI/WSGI: %.2f по пропускной способности, %.2f по p95' % (
+                asgi['rps'] / wsgi['rps'], asgi['p95_ms'] / wsgi['p95_ms'])))
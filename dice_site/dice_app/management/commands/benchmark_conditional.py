@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from dice_app.benchmark import run_conditional_benchmark
+from dice_app.models import City
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает время полного ответа страницы расписания и ответа 304 по If-None-Match'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--city', type=int, help='Город для cookie selected_city, по умолчанию первый открытый')
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError('Нужно не меньше двух запросов')
+        cities = City.objects.filter(close=False).order_by('id').values_list('id', flat=True)
+        city_id = options['city'] or cities.first()
+        if city_id is None:
+            raise CommandError('Нет открытых городов')
+        setup_test_environment()
+        try:
+            results = run_conditional_benchmark(city_id, options['requests'])
+        finally:
+            teardown_test_environment()
+        for name, result in results.items():
+            self.stdout.write('%s: статус %s, запросов %s, %s байт, p50 %s мс, p95 %s мс' % (
+                name, result['status'], result['queries'], result['bytes'], result['p50_ms'], result['p95_ms']))
+        full, not_modified = results['full'], results['not_modified']
+        if not_modified['status'] != 304:
+            raise CommandError('Повторный запрос не получил 304')
+        self.stdout.write(self.style.SUCCESS('304 быстрее полного ответа в %.1f раз по p50' % (
+            full['p50_ms'] / not_modified['p50_ms'])))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from dice_app.benchmark import run_connection_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает время ответа страницы с новым соединением на каждый запрос и с постоянными соединениями'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Адрес страницы, по умолчанию расписание')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--max-age', type=int, default=60, help='CONN_MAX_AGE для постоянных соединений')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError('Нужно не меньше двух запросов')
+        url = options['url'] or reverse('records')
+        setup_test_environment()
+        try:
+            results = [run_connection_benchmark(url, options['requests'], max_age)
+                       for max_age in (0, options['max_age'])]
+        finally:
+            teardown_test_environment()
+        for result in results:
+            self.stdout.write('CONN_MAX_AGE=%(max_age)s: соединений %(connections)s, статус %(status)s, '
+                              'p50 %(p50_ms)s мс, p95 %(p95_ms)s мс' % result)
@@ -0,0 +1,29 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from dice_app.benchmark import seed, benchmark_environment
+from dice_app.models import City, Game
+from dice_app.schedule import get_schedule_page
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу тестовыми играми, выводит план и время запроса расписания и откатывает изменения'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=100000)
+        parser.add_argument('--cities', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with benchmark_environment(), transaction.atomic():
+            seed(cities=options['cities'], games=options['games'])
+            city = City.objects.order_by('-id').first()
+            games = Game.objects.for_schedule().filter(room__city=city, canceled=False,
+                                                       date__gte=datetime.date.today())
+            self.stdout.write(games.order_by('date', 'time', 'id').explain())
+            start = time.perf_counter()
+            get_schedule_page(games)
+            self.stdout.write('Время запроса расписания: %.2f мс' % ((time.perf_counter() - start) * 1000))
+            transaction.set_rollback(True)
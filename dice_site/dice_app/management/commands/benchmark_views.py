@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from dice_app.benchmark import seed, seed_users, run_benchmarks, check_budgets, compare_results, dump_results, \
+    benchmark_environment
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу тестовыми данными, измеряет число запросов и время ответа страниц '
+            'и откатывает изменения')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=10000)
+        parser.add_argument('--cities', type=int, default=10)
+        parser.add_argument('--users', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument('--compare', help='Файл с результатами предыдущего запуска')
+        parser.add_argument('--budgets', help='Файл с бюджетами числа запросов')
+
+    def handle(self, *args, **options):
+        budgets = None
+        if options['budgets']:
+            with open(options['budgets'], encoding='utf-8') as file:
+                budgets = json.load(file)
+        setup_test_environment()
+        try:
+            with benchmark_environment(), transaction.atomic():
+                seed(cities=options['cities'], games=options['games'])
+                user = seed_users(options['users'])
+                results = run_benchmarks(user, options['repeat'])
+                transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+        dump_results(results, options['output'])
+        for name, result in results.items():
+            self.stdout.write('%s: %s' % (name, result))
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                for line in compare_results(json.load(file), results):
+                    self.stdout.write(line)
+        errors = check_budgets(results, budgets)
+        if errors:
+            raise CommandError('Превышен бюджет: ' + '; '.join(errors))
+        self.stdout.write(self.style.SUCCESS('Бюджеты соблюдены'))
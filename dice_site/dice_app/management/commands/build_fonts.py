@@ -0,0 +1,31 @@
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from dice_app.assets import FONT_UNICODES, get_used_icons
+
+
+class Command(BaseCommand):
+    help = ('Собирает из TTF шрифтов WOFF2 только с используемыми на сайте символами. '
+            'Нужны пакеты fonttools и brotli из requirements.txt')
+
+    def handle(self, *args, **options):
+        try:
+            from fontTools import subset
+            from fontTools.ttLib import TTFont
+        except ImportError:
+            raise CommandError('Установите fonttools и brotli')
+        app_path = Path(apps.get_app_config('dice_app').path)
+        texts = [path.read_text(encoding='utf-8') for folder in ('static/css', 'static/js', 'templates')
+                 for path in (app_path / folder).rglob('*') if path.suffix in ('.css', '.js', '.html')]
+        unicodes = set(FONT_UNICODES) | get_used_icons(texts)
+        for path in sorted((app_path / 'static/font').glob('*.ttf')):
+            font = TTFont(path)
+            subsetter = subset.Subsetter(subset.Options(layout_features=['*'], name_IDs=['*']))
+            subsetter.populate(unicodes=unicodes)
+            subsetter.subset(font)
+            font.flavor = 'woff2'
+            font.save(path.with_suffix('.woff2'))
+            self.stdout.write('%s: %s -> %s байт' % (path.name, path.stat().st_size,
+                                                     path.with_suffix('.woff2').stat().st_size))
@@ -0,0 +1,35 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from dice_app.images import IMAGE_FIELDS, generate_derivatives, find_derivatives, record_derivatives
+
+
+class Command(BaseCommand):
+    help = 'Создает уменьшенные копии загруженных изображений'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=None)
+        parser.add_argument('--force', action='store_true', help='Пересоздать существующие копии')
+
+    def handle(self, *args, **options):
+        names = set()
+        for model_name, fields in IMAGE_FIELDS.items():
+            model = apps.get_model('dice_app', model_name)
+            for field in fields:
+                names.update(model.objects.exclude(**{field: ''}).values_list(field, flat=True).distinct())
+        if not options['force']:
+            missing = []
+            for name in names:
+                widths = find_derivatives(name)
+                if widths:
+                    record_derivatives(name, widths)
+                else:
+                    missing.append(name)
+            names = missing
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options['processes']) as executor:
+            done = sum(executor.map(generate_derivatives, sorted(names)))
+        self.stdout.write(self.style.SUCCESS('Обработано изображений: %s из %s' % (done, len(names))))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from dice_app.schedule import rebuild_schedule_days
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает сводку игр и свободных мест по дням'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = rebuild_schedule_days(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Дни расписания пересобраны: %s' % count))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from dice_app.models import Game
+from dice_app.search import update_search_documents
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковые документы игр'
+
+    def handle(self, *args, **options):
+        update_search_documents(Game.objects.all())
+        self.stdout.write(self.style.SUCCESS('Поисковые документы обновлены: %s' % Game.objects.count()))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from dice_app.avatars import refresh_avatar_catalog
+
+
+class Command(BaseCommand):
+    help = 'Обновляет каталог аватаров'
+
+    def handle(self, *args, **options):
+        urls = refresh_avatar_catalog()
+        self.stdout.write(self.style.SUCCESS('Аватаров в каталоге: %s' % len(urls)))
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_document(game):
+    values = [game.name, game.type_game, game.description, game.system.system, game.master.name,
+              game.master.last_name, game.room.name, game.room.address.address]
+    return ' '.join(str(value) for value in values).lower()
+
+
+def add_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE dice_app_gamesearch ADD FULLTEXT INDEX gamesearch_document_ft (document)')
+
+
+def remove_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE dice_app_gamesearch DROP INDEX gamesearch_document_ft')
+
+
+def fill_documents(apps, schema_editor):
+    Game = apps.get_model('dice_app', 'Game')
+    GameSearch = apps.get_model('dice_app', 'GameSearch')
+    games = Game.objects.select_related('system', 'master', 'room__address')
+    GameSearch.objects.bulk_create([GameSearch(game=game, document=build_document(game)) for game in games],
+                                   batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dice_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameSearch',
+            fields=[
+                ('game', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search', serialize=False, to='dice_app.game', verbose_name='Игра')),
+                ('document', models.TextField(verbose_name='Поисковый документ')),
+            ],
+            options={
+                'verbose_name': 'поисковый документ',
+                'verbose_name_plural': 'поисковые документы',
+            },
+        ),
+        migrations.RunPython(add_fulltext_index, remove_fulltext_index),
+        migrations.RunPython(fill_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dice_app', '0002_gamesearch'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['date', 'canceled'], name='game_date_canceled_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dice_app', '0003_game_date_canceled_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Booking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('booked', 'Записан'), ('waitlist', 'Лист ожидания'), ('canceled', 'Отменено')], default='booked', max_length=10, verbose_name='Статус')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Изменено')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='dice_app.game', verbose_name='Игра')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='dice_app.profile', verbose_name='Игрок')),
+            ],
+            options={
+                'verbose_name': 'запись',
+                'verbose_name_plural': 'записи',
+                'ordering': ['game', 'updated_at'],
+                'indexes': [models.Index(fields=['game', 'status', 'updated_at'], name='booking_game_status_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(fields=('profile', 'game'), name='booking_profile_game_unique'),
+        ),
+    ]
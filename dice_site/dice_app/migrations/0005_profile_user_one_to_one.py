@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Min
+
+
+def remove_duplicate_profiles(apps, schema_editor):
+    Profile = apps.get_model('dice_app', 'Profile')
+    Booking = apps.get_model('dice_app', 'Booking')
+    duplicates = Profile.objects.values('user').annotate(count=Count('id'), keep=Min('id')).filter(count__gt=1)
+    for duplicate in duplicates:
+        for profile in Profile.objects.filter(user=duplicate['user']).exclude(pk=duplicate['keep']):
+            booked_games = Booking.objects.filter(profile_id=duplicate['keep']).values_list('game_id', flat=True)
+            Booking.objects.filter(profile=profile).exclude(game_id__in=list(booked_games)).update(
+                profile_id=duplicate['keep'])
+            profile.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('dice_app', '0004_booking'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_profiles, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='profile',
+            name='user',
+            field=models.OneToOneField(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='profile', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dice_app', '0005_profile_user_one_to_one'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['date', 'time'], name='game_date_time_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dice_app', '0006_game_date_time_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedGame',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=40, verbose_name='Название')),
+                ('type_game', models.CharField(default='Ваншот', max_length=20, verbose_name='Тип сессии')),
+                ('description', models.TextField(max_length=900, verbose_name='Описание')),
+                ('image', models.ImageField(upload_to='game/image', verbose_name='Изображение')),
+                ('price', models.IntegerField(default=5000, verbose_name='Стоимость')),
+                ('date', models.DateField(verbose_name='Дата проведения')),
+                ('time', models.TimeField(verbose_name='Время проведения')),
+                ('total_seats', models.IntegerField(default=6, verbose_name='Количество участников')),
+                ('filled_seats', models.IntegerField(default=0, verbose_name='Занято мест')),
+                ('canceled', models.BooleanField(db_index=True, default=False, verbose_name='Отменено')),
+                ('original_id', models.BigIntegerField(unique=True, verbose_name='Номер игры')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Перенесено в архив')),
+                ('master', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='dice_app.master', verbose_name='Мастер')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='dice_app.room', verbose_name='Место игры')),
+                ('system', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='dice_app.systems', verbose_name='Система')),
+            ],
+            options={
+                'verbose_name': 'архивная игра',
+                'verbose_name_plural': 'архив игр',
+                'ordering': ['-date', '-time'],
+                'abstract': False,
+                'indexes': [models.Index(fields=['date', 'time'], name='archivedgame_date_time_idx')],
+            },
+        ),
+    ]
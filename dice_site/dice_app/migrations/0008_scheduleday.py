@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import F, Value, Count, Sum
+from django.db.models.functions import Greatest
+
+
+def fill_schedule_days(apps, schema_editor):
+    Game = apps.get_model('dice_app', 'Game')
+    ScheduleDay = apps.get_model('dice_app', 'ScheduleDay')
+    rows = Game.objects.filter(canceled=False).order_by().values('room__city_id', 'date').annotate(
+        games_count=Count('id'), free_seats=Sum(Greatest(F('total_seats') - F('filled_seats'), Value(0))))
+    ScheduleDay.objects.bulk_create([
+        ScheduleDay(city_id=row['room__city_id'], date=row['date'], games_count=row['games_count'],
+                    free_seats=row['free_seats'])
+        for row in rows], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dice_app', '0007_archivedgame'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('games_count', models.PositiveIntegerField(default=0, verbose_name='Игр')),
+                ('free_seats', models.PositiveIntegerField(default=0, verbose_name='Свободных мест')),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_days', to='dice_app.city', verbose_name='Город')),
+            ],
+            options={
+                'verbose_name': 'день расписания',
+                'verbose_name_plural': 'дни расписания',
+                'ordering': ['city', 'date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='scheduleday',
+            constraint=models.UniqueConstraint(fields=('city', 'date'), name='schedule_day_city_date_unique'),
+        ),
+        migrations.RunPython(fill_schedule_days, migrations.RunPython.noop),
+    ]
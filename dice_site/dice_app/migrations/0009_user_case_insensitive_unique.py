@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Value
+from django.db.models.functions import Lower, NullIf
+
+USER_CONSTRAINTS = [
+    models.UniqueConstraint(Lower('username'), name='auth_user_username_ci_unique'),
+    models.UniqueConstraint(Lower(NullIf('email', Value(''))), name='auth_user_email_ci_unique'),
+]
+
+
+def add_user_constraints(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    for constraint in USER_CONSTRAINTS:
+        key, = constraint.expressions
+        duplicates = list(User.objects.annotate(key=key).exclude(key=None).values('key').annotate(
+            count=Count('id')).filter(count__gt=1).values_list('key', flat=True))
+        if duplicates:
+            raise RuntimeError('Повторяющиеся без учета регистра значения (%s): %s' % (
+                constraint.name, ', '.join(duplicates)))
+        schema_editor.add_constraint(User, constraint)
+
+
+def remove_user_constraints(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    for constraint in USER_CONSTRAINTS:
+        schema_editor.remove_constraint(User, constraint)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('dice_app', '0008_scheduleday'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_user_constraints, remove_user_constraints),
+    ]
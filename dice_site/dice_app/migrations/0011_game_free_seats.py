@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:08
+
+import dice_app.models
+from django.db import migrations, models
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+
+def fill_free_seats(apps, schema_editor):
+    for name in ('Game', 'ArchivedGame'):
+        apps.get_model('dice_app', name).objects.update(
+            free_seats=Greatest(F('total_seats') - F('filled_seats'), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dice_app', '0010_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedgame',
+            name='free_seats',
+            field=dice_app.models.FreeSeatsField(default=0, editable=False, verbose_name='Свободно мест'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='free_seats',
+            field=dice_app.models.FreeSeatsField(default=0, editable=False, verbose_name='Свободно мест'),
+        ),
+        migrations.RunPython(fill_free_seats, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['date', 'free_seats'], name='game_date_free_seats_idx'),
+        ),
+    ]
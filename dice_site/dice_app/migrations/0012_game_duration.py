@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:11
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dice_app', '0011_game_free_seats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedgame',
+            name='duration',
+            field=models.PositiveIntegerField(default=240, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(1440)], verbose_name='Длительность, мин'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='duration',
+            field=models.PositiveIntegerField(default=240, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(1440)], verbose_name='Длительность, мин'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['room', 'date'], name='game_room_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['master', 'date'], name='game_master_date_idx'),
+        ),
+    ]
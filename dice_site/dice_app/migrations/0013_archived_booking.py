@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dice_app', '0012_game_duration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('booked', 'Записан'), ('waitlist', 'Лист ожидания'), ('canceled', 'Отменено')], max_length=10, verbose_name='Статус')),
+                ('created_at', models.DateTimeField(verbose_name='Создано')),
+                ('updated_at', models.DateTimeField(verbose_name='Изменено')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='dice_app.archivedgame', verbose_name='Игра')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to='dice_app.profile', verbose_name='Игрок')),
+            ],
+            options={
+                'verbose_name': 'архивная запись',
+                'verbose_name_plural': 'архив записей',
+                'ordering': ['game', 'updated_at'],
+            },
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser, User
 from django.db import models
+from django.core.validators import MinValueValidator, MaxValueValidator
 
 
 class City(models.Model):
@@ -40,6 +41,7 @@ class Room(models.Model):
     photo = models.ImageField(upload_to='room/photo', verbose_name="Фото")
     icon = models.ImageField(upload_to='room/icon', blank=True, null=True, verbose_name="Иконка")
     close = models.BooleanField(default=False, db_index=True, verbose_name="Закрыта")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Изменено")
 
     objects = models.Manager()
 
@@ -86,6 +88,7 @@ class Master(models.Model):
     city = models.ForeignKey(City, on_delete=models.PROTECT, verbose_name="Город")
     on_holiday = models.BooleanField(default=False, db_index=True, verbose_name="В отпуске")
     fired = models.BooleanField(default=False, db_index=True, verbose_name="Уволен")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Изменено")
 
     objects = models.Manager()
 
@@ -98,7 +101,34 @@ class Master(models.Model):
         verbose_name_plural = 'мастера'
 
 
-class Game(models.Model):
+ALMOST_FULL_SEATS = 2
+MAX_GAME_DURATION = 24 * 60
+
+
+class FreeSeatsField(models.PositiveIntegerField):
+
+    def pre_save(self, model_instance, add):
+        value = max(model_instance.total_seats - model_instance.filled_seats, 0)
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+class GameQuerySet(models.QuerySet):
+
+    def for_schedule(self):
+        return self.select_related('master', 'system', 'room__address').only(
+            'name', 'type_game', 'description', 'image', 'price', 'date', 'time', 'total_seats', 'filled_seats',
+            'free_seats', 'canceled', 'master__name', 'master__last_name', 'system__system', 'room__name',
+            'room__address__address')
+
+    def with_free_seats(self):
+        return self.filter(free_seats__gt=0)
+
+    def almost_full(self, seats=ALMOST_FULL_SEATS):
+        return self.filter(free_seats__gt=0, free_seats__lte=seats)
+
+
+class AbstractGame(models.Model):
     name = models.CharField(max_length=40, verbose_name="Название")
     system = models.ForeignKey(Systems, on_delete=models.PROTECT, verbose_name="Система")
     type_game = models.CharField(max_length=20, default="Ваншот", verbose_name="Тип сессии")
@@ -109,25 +139,89 @@ class Game(models.Model):
     room = models.ForeignKey(Room, on_delete=models.PROTECT, verbose_name="Место игры")
     date = models.DateField(verbose_name="Дата проведения")
     time = models.TimeField(verbose_name="Время проведения")
+    duration = models.PositiveIntegerField(default=240, verbose_name="Длительность, мин",
+                                           validators=[MinValueValidator(1), MaxValueValidator(MAX_GAME_DURATION)])
     total_seats = models.IntegerField(default=6, verbose_name="Количество участников")
     filled_seats = models.IntegerField(default=0, verbose_name="Занято мест")
+    free_seats = FreeSeatsField(default=0, editable=False, verbose_name="Свободно мест")
     canceled = models.BooleanField(default=False, db_index=True, verbose_name="Отменено")
-
-    objects = models.Manager()
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Изменено")
 
     def __str__(self):
         return self.name
 
     class Meta:
+        abstract = True
         ordering = ['date', 'time', 'room']
+
+
+class Game(AbstractGame):
+    objects = GameQuerySet.as_manager()
+
+    class Meta(AbstractGame.Meta):
+        indexes = [
+            models.Index(fields=['date', 'canceled'], name='game_date_canceled_idx'),
+            models.Index(fields=['date', 'time'], name='game_date_time_idx'),
+            models.Index(fields=['date', 'free_seats'], name='game_date_free_seats_idx'),
+            models.Index(fields=['room', 'date'], name='game_room_date_idx'),
+            models.Index(fields=['master', 'date'], name='game_master_date_idx'),
+        ]
         verbose_name = 'игра'
         verbose_name_plural = 'игры'
 
-User._meta.get_field('email')._unique = True
+
+class ArchivedGame(AbstractGame):
+    original_id = models.BigIntegerField(unique=True, verbose_name="Номер игры")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Перенесено в архив")
+
+    objects = models.Manager()
+
+    class Meta(AbstractGame.Meta):
+        ordering = ['-date', '-time']
+        indexes = [
+            models.Index(fields=['date', 'time'], name='archivedgame_date_time_idx'),
+        ]
+        verbose_name = 'архивная игра'
+        verbose_name_plural = 'архив игр'
+
+
+class GameSearch(models.Model):
+    game = models.OneToOneField(Game, on_delete=models.CASCADE, primary_key=True, related_name='search',
+                                verbose_name="Игра")
+    document = models.TextField(verbose_name="Поисковый документ")
+
+    objects = models.Manager()
+
+    def __str__(self):
+        return str(self.game)
+
+    class Meta:
+        verbose_name = 'поисковый документ'
+        verbose_name_plural = 'поисковые документы'
+
+
+class ScheduleDay(models.Model):
+    city = models.ForeignKey(City, on_delete=models.CASCADE, related_name='schedule_days', verbose_name="Город")
+    date = models.DateField(verbose_name="Дата")
+    games_count = models.PositiveIntegerField(default=0, verbose_name="Игр")
+    free_seats = models.PositiveIntegerField(default=0, verbose_name="Свободных мест")
+
+    objects = models.Manager()
+
+    def __str__(self):
+        return str(self.city) + " - " + str(self.date)
+
+    class Meta:
+        ordering = ['city', 'date']
+        constraints = [
+            models.UniqueConstraint(fields=['city', 'date'], name='schedule_day_city_date_unique'),
+        ]
+        verbose_name = 'день расписания'
+        verbose_name_plural = 'дни расписания'
 
 
 class Profile(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, editable=False)
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile', editable=False)
     male = models.CharField(max_length=20, blank=True, null=True, choices=[('М', 'мужской'), ('Ж', 'женский')],
                             verbose_name='Пол')
     city = models.CharField(max_length=20, blank=True, null=True, verbose_name='Город')
@@ -144,4 +238,55 @@ class Profile(models.Model):
     class Meta:
         ordering = ['user']
         verbose_name = 'игрок'
-        verbose_name_plural = 'игроки'
\ No newline at end of file
+        verbose_name_plural = 'игроки'
+
+class Booking(models.Model):
+    BOOKED = 'booked'
+    WAITLIST = 'waitlist'
+    CANCELED = 'canceled'
+    CHOICE_STATUS = [
+        (BOOKED, 'Записан'),
+        (WAITLIST, 'Лист ожидания'),
+        (CANCELED, 'Отменено')
+    ]
+    ACTIVE_STATUSES = (BOOKED, WAITLIST)
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='bookings', verbose_name="Игрок")
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='bookings', verbose_name="Игра")
+    status = models.CharField(max_length=10, choices=CHOICE_STATUS, default=BOOKED, verbose_name="Статус")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Изменено")
+
+    objects = models.Manager()
+
+    def __str__(self):
+        return str(self.profile) + " - " + str(self.game)
+
+    class Meta:
+        ordering = ['game', 'updated_at']
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'game'], name='booking_profile_game_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['game', 'status', 'updated_at'], name='booking_game_status_idx'),
+        ]
+        verbose_name = 'запись'
+        verbose_name_plural = 'записи'
+
+
+class ArchivedBooking(models.Model):
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='archived_bookings',
+                                verbose_name="Игрок")
+    game = models.ForeignKey(ArchivedGame, on_delete=models.CASCADE, related_name='bookings', verbose_name="Игра")
+    status = models.CharField(max_length=10, choices=Booking.CHOICE_STATUS, verbose_name="Статус")
+    created_at = models.DateTimeField(verbose_name="Создано")
+    updated_at = models.DateTimeField(verbose_name="Изменено")
+
+    objects = models.Manager()
+
+    def __str__(self):
+        return str(self.profile) + " - " + str(self.game)
+
+    class Meta:
+        ordering = ['game', 'updated_at']
+        verbose_name = 'архивная запись'
+        verbose_name_plural = 'архив записей'
@@ -0,0 +1,167 @@
+import json
+import logging
+import threading
+import time
+import traceback
+from collections import defaultdict, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+UNRESOLVED_VIEW = '<unresolved>'
+
+_template_timer = ContextVar('template_timer', default=None)
+_original_render = Template.render
+
+
+class RollingHistogram:
+
+    def __init__(self, size=1000):
+        self.samples = defaultdict(lambda: deque(maxlen=size))
+        self.lock = threading.Lock()
+
+    def add(self, name, value):
+        with self.lock:
+            self.samples[name].append(value)
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+    def summary(self):
+        with self.lock:
+            samples = {name: sorted(values) for name, values in self.samples.items()}
+        rows = []
+        for name, values in sorted(samples.items()):
+            rows.append({
+                'name': name,
+                'count': len(values),
+                'p50': values[int(len(values) * 0.5)],
+                'p95': values[min(int(len(values) * 0.95), len(values) - 1)],
+                'p99': values[min(int(len(values) * 0.99), len(values) - 1)],
+                'max': values[-1],
+            })
+        return rows
+
+
+histogram = RollingHistogram()
+
+
+def get_query_origin():
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        if frame.filename.startswith(base_dir) and not frame.filename.endswith('performance.py'):
+            return '%s:%s in %s' % (frame.filename[len(base_dir) + 1:], frame.lineno, frame.name)
+    return None
+
+
+class QueryTimer:
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.duration += duration
+            if duration >= settings.SLOW_QUERY_MS:
+                logger.warning(json.dumps({'event': 'slow_query', 'duration_ms': round(duration, 2), 'sql': sql,
+                                           'origin': get_query_origin()}, ensure_ascii=False))
+
+
+class TemplateTimer:
+
+    def __init__(self):
+        self.rendering = False
+        self.duration = 0.0
+
+
+def time_template_render(render):
+    @wraps(render)
+    def timed_render(self, context):
+        timer = _template_timer.get()
+        if timer is None or timer.rendering:
+            return render(self, context)
+        timer.rendering = True
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            timer.duration += (time.perf_counter() - start) * 1000
+            timer.rendering = False
+
+    timed_render.timed = True
+    return timed_render
+
+
+def install_template_timer():
+    if not getattr(Template.render, 'timed', False):
+        Template.render = time_template_render(_original_render)
+
+
+def uninstall_template_timer():
+    Template.render = _original_render
+
+
+@receiver(setting_changed)
+def restore_template_render(setting, value, **kwargs):
+    if setting == 'PERFORMANCE_INSTRUMENTATION' and not value:
+        uninstall_template_timer()
+
+
+class PerformanceMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        install_template_timer()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        template_timer = TemplateTimer()
+        token = _template_timer.set(template_timer)
+        request._view_started = None
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                response = self.get_response(request)
+        finally:
+            _template_timer.reset(token)
+        finished = time.perf_counter()
+        view_started = request._view_started or start
+        timings = {
+            'db': timer.duration,
+            'view': (finished - view_started) * 1000 - template_timer.duration,
+            'tpl': template_timer.duration,
+            'total': (finished - start) * 1000,
+        }
+        metrics = ['db;dur=%.1f;desc="%s queries"' % (timings['db'], timer.count)]
+        metrics += ['%s;dur=%.1f' % (metric, timings[metric]) for metric in ('view', 'tpl', 'total')]
+        response['Server-Timing'] = ', '.join(metrics)
+        name = request.resolver_match.view_name if request.resolver_match else UNRESOLVED_VIEW
+        histogram.add(name, round(timings['total'], 2))
+        logger.info(json.dumps({'event': 'request', 'view': name, 'method': request.method,
+                                'status': response.status_code, 'queries': timer.count,
+                                **{metric + '_ms': round(value, 2) for metric, value in timings.items()}},
+                               ensure_ascii=False))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._view_started = time.perf_counter()
@@ -0,0 +1,94 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA = 'replica'
+PINNED_UNTIL_KEY = '_db_pinned_until'
+PRIMARY_ONLY_APPS = {'sessions'}
+
+_state = ContextVar('db_routing', default=None)
+_primary_reads = ContextVar('db_primary_reads', default=False)
+
+
+def has_replica():
+    return REPLICA in connections.settings
+
+
+def get_state():
+    state = _state.get()
+    if state is None:
+        state = {'replica': False, 'pinned': False, 'written': False}
+        _state.set(state)
+    return state
+
+
+@contextmanager
+def replica_reads():
+    state = get_state()
+    previous = state['replica']
+    state['replica'] = True
+    try:
+        yield
+    finally:
+        state['replica'] = previous
+
+
+@contextmanager
+def primary_reads():
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+
+def render_with_replica_reads(response):
+    if hasattr(response, 'render') and not response.is_rendered:
+        render = response.render
+
+        def render_replica():
+            with replica_reads():
+                return render()
+
+        response.render = render_replica
+    return response
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (state and state['replica'] and not state['pinned'] and not _primary_reads.get() and has_replica()
+                and model._meta.app_label not in PRIMARY_ONLY_APPS):
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        get_state()['written'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaPinningMiddleware:
+
+    def __init__(self, get_response):
+        if not has_replica():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = request.session.get(PINNED_UNTIL_KEY, 0) > time.time()
+        token = _state.set({'replica': False, 'pinned': pinned, 'written': False})
+        try:
+            response = self.get_response(request)
+            if _state.get()['written']:
+                request.session[PINNED_UNTIL_KEY] = time.time() + settings.REPLICA_PIN_SECONDS
+        finally:
+            _state.reset(token)
+        return response
@@ -0,0 +1,153 @@
+import datetime
+import hashlib
+from functools import lru_cache
+from itertools import groupby
+from operator import attrgetter
+
+from django.db import transaction
+from django.db.models import Q, Count, Max, Sum
+from django.db.models.functions import Coalesce
+from django.templatetags.static import static
+from django.utils.safestring import mark_safe
+
+from .models import Game, ScheduleDay
+from .search import get_search_backend
+from .versions import get_version, aget_version, bump_versions
+
+SCHEDULE_PAGE_SIZE = 30
+
+
+@lru_cache(maxsize=256)
+def get_seat_strip(filled_seats, total_seats):
+    fill, empty = static('icon/icon_fill.png'), static('icon/icon_empty.png')
+    return mark_safe(''.join('<img class="img-seat" src="%s">' % (fill if number < filled_seats else empty)
+                             for number in range(total_seats)))
+
+
+def build_schedule(games, day_counts=None):
+    day_counts = day_counts or {}
+    schedule = []
+    for date, day_games in groupby(games, key=attrgetter('date')):
+        day_games = list(day_games)
+        for game in day_games:
+            game.seat_strip = get_seat_strip(game.filled_seats, game.total_seats)
+        schedule.append((date, day_counts.get(date, len(day_games)), day_games))
+    return schedule
+
+
+def get_schedule_games(city, search_query='', free_only=False):
+    games = Game.objects.for_schedule().filter(room__city=city, canceled=False, date__gte=datetime.date.today())
+    if free_only:
+        games = games.with_free_seats()
+    if search_query:
+        games = get_search_backend().search(games, search_query)
+    return games
+
+
+def encode_cursor(game):
+    return '%s_%s_%s' % (game.date.isoformat(), game.time.isoformat(), game.id)
+
+
+def decode_cursor(cursor):
+    date, time, pk = cursor.split('_')
+    return datetime.date.fromisoformat(date), datetime.time.fromisoformat(time), int(pk)
+
+
+def after_cursor(date, time, pk):
+    return Q(date__gt=date) | Q(date=date, time__gt=time) | Q(date=date, time=time, id__gt=pk)
+
+
+def order_schedule(games, cursor=None):
+    games = games.order_by('date', 'time', 'id')
+    if cursor:
+        games = games.filter(after_cursor(*decode_cursor(cursor)))
+    return games
+
+
+def get_schedule_page(games, cursor=None, size=SCHEDULE_PAGE_SIZE):
+    games = order_schedule(games, cursor)
+    page = list(games[:size + 1])
+    next_cursor = None
+    if len(page) > size:
+        page = page[:size]
+        last = page[-1]
+        page += games.filter(date=last.date).filter(after_cursor(last.date, last.time, last.id))
+        next_cursor = encode_cursor(page[-1])
+    return build_schedule(page), next_cursor
+
+
+async def aget_schedule_games(games, cursor=None, size=SCHEDULE_PAGE_SIZE):
+    games = order_schedule(games, cursor)
+    page = [game async for game in games[:size + 1].aiterator()]
+    next_cursor = None
+    if len(page) > size:
+        page = page[:size]
+        last = page[-1]
+        rest = games.filter(date=last.date).filter(after_cursor(last.date, last.time, last.id))
+        page += [game async for game in rest.aiterator()]
+        next_cursor = encode_cursor(page[-1])
+    return page, next_cursor
+
+
+async def aget_day_counts(city_id, date_from, size=SCHEDULE_PAGE_SIZE):
+    days = ScheduleDay.objects.filter(city_id=city_id, date__gte=date_from).only('date', 'games_count')
+    return {day.date: day.games_count async for day in days.order_by('date')[:size].aiterator()}
+
+
+def get_schedule_stamp(city_id):
+    games = Game.objects.filter(room__city_id=city_id, date__gte=datetime.date.today())
+    return games.aggregate(games=Count('id'), game=Max('updated_at'), room=Max('room__updated_at'),
+                           master=Max('master__updated_at'))
+
+
+def get_schedule_version_key(city_id):
+    return 'schedule_version:%s' % city_id
+
+
+def invalidate_schedule(*city_ids):
+    bump_versions(*[get_schedule_version_key(city_id) for city_id in city_ids])
+
+
+def get_schedule_cache_key(city_id, is_authenticated, search_query, cursor, free_only=False):
+    version = get_version(get_schedule_version_key(city_id))
+    return make_schedule_cache_key(version, city_id, is_authenticated, search_query, cursor, free_only)
+
+
+async def aget_schedule_cache_key(city_id, is_authenticated, search_query, cursor, free_only=False):
+    version = await aget_version(get_schedule_version_key(city_id))
+    return make_schedule_cache_key(version, city_id, is_authenticated, search_query, cursor, free_only)
+
+
+def make_schedule_cache_key(version, city_id, is_authenticated, search_query, cursor, free_only=False):
+    query_hash = hashlib.md5(('%s|%s|%d' % (search_query, cursor, free_only)).encode()).hexdigest()
+    return 'schedule:%s:%s:%s:%d:%s' % (city_id, version, datetime.date.today().isoformat(), is_authenticated,
+                                        query_hash)
+
+
+def refresh_schedule_days(*days):
+    with transaction.atomic():
+        for city_id, date in sorted(set(days)):
+            totals = Game.objects.filter(room__city_id=city_id, date=date, canceled=False).aggregate(
+                games_count=Count('id'), free_seats=Coalesce(Sum('free_seats'), 0))
+            if totals['games_count']:
+                ScheduleDay.objects.update_or_create(city_id=city_id, date=date, defaults=totals)
+            else:
+                ScheduleDay.objects.filter(city_id=city_id, date=date).delete()
+
+
+def rebuild_schedule_days(batch_size=500):
+    rows = Game.objects.filter(canceled=False).order_by().values('room__city_id', 'date').annotate(
+        games_count=Count('id'), free_seats=Sum('free_seats'))
+    days = [ScheduleDay(city_id=row['room__city_id'], date=row['date'], games_count=row['games_count'],
+                        free_seats=row['free_seats']) for row in rows]
+    with transaction.atomic():
+        ScheduleDay.objects.all().delete()
+        ScheduleDay.objects.bulk_create(days, batch_size=batch_size)
+    return len(days)
+
+
+def get_schedule_days(city_id, date_from, date_to=None):
+    days = ScheduleDay.objects.filter(city_id=city_id, date__gte=date_from)
+    if date_to is not None:
+        days = days.filter(date__lte=date_to)
+    return days.order_by('date')
@@ -0,0 +1,64 @@
+import operator
+import re
+from functools import reduce
+from itertools import islice
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import GameSearch
+
+
+def build_document(game):
+    values = [game.name, game.type_game, game.description, game.system.system, game.master.name,
+              game.master.last_name, game.room.name, game.room.address.address]
+    return ' '.join(str(value) for value in values).lower()
+
+
+def update_search_documents(games, batch_size=500):
+    features = connections[DEFAULT_DB_ALIAS].features
+    games = games.select_related('system', 'master', 'room__address').iterator(chunk_size=batch_size)
+    while documents := [GameSearch(game=game, document=build_document(game)) for game in islice(games, batch_size)]:
+        if features.supports_update_conflicts_with_target:
+            GameSearch.objects.bulk_create(documents, update_conflicts=True, unique_fields=['game'],
+                                           update_fields=['document'])
+        elif features.supports_update_conflicts:
+            GameSearch.objects.bulk_create(documents, update_conflicts=True, update_fields=['document'])
+        else:
+            for document in documents:
+                GameSearch.objects.update_or_create(game=document.game, defaults={'document': document.document})
+
+
+def split_query(query):
+    return re.findall(r'[^\s+\-<>()~*"@]+', query.lower())
+
+
+class SimpleSearchBackend:
+
+    def search(self, queryset, query):
+        terms = split_query(query)
+        if not terms:
+            return queryset
+        return queryset.filter(reduce(operator.or_, [Q(search__document__contains=term) for term in terms]))
+
+
+class MySQLSearchBackend:
+
+    def search(self, queryset, query):
+        terms = split_query(query)
+        if not terms:
+            return queryset
+        against = ' '.join(term + '*' for term in terms)
+        rank = RawSQL('MATCH (dice_app_gamesearch.document) AGAINST (%s IN BOOLEAN MODE)', [against])
+        return queryset.filter(search__isnull=False).alias(search_rank=rank).filter(search_rank__gt=0)
+
+
+def get_search_backend():
+    if settings.SEARCH_BACKEND:
+        return import_string(settings.SEARCH_BACKEND)()
+    if connection.vendor == 'mysql':
+        return MySQLSearchBackend()
+    return SimpleSearchBackend()
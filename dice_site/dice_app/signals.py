@@ -0,0 +1,148 @@
+import datetime
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .avatars import get_avatar_urls, refresh_avatar_catalog
+from .cities import invalidate_cities
+from .images import IMAGE_FIELDS, ensure_derivatives
+from .models import City, Address, Room, Systems, Master, Game, Profile
+from .schedule import invalidate_schedule, refresh_schedule_days
+from .search import update_search_documents
+from .versions import bump_versions, get_model_version_key
+
+
+@receiver(post_save, sender=Game)
+def update_game_search(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_documents(Game.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Systems)
+def update_system_search(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_documents(Game.objects.filter(system=instance))
+
+
+@receiver(post_save, sender=Master)
+def update_master_search(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_documents(Game.objects.filter(master=instance))
+
+
+@receiver(post_save, sender=Room)
+def update_room_search(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_documents(Game.objects.filter(room=instance))
+
+
+@receiver(post_save, sender=Address)
+def update_address_search(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_documents(Game.objects.filter(room__address=instance))
+
+
+@receiver(pre_save, sender=Game)
+def invalidate_previous_game_schedule(sender, instance, **kwargs):
+    days = []
+    if instance.pk:
+        days = list(Game.objects.filter(pk=instance.pk).values_list('room__city_id', 'date'))
+        invalidate_schedule(*[city_id for city_id, _ in days])
+    instance._previous_schedule_days = days
+
+
+@receiver([post_save, post_delete], sender=Game)
+def invalidate_game_schedule(sender, instance, **kwargs):
+    if instance.date < datetime.date.today():
+        return
+    invalidate_schedule(*Room.objects.filter(pk=instance.room_id).values_list('city_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Game)
+def update_game_schedule_days(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    city_ids = Room.objects.filter(pk=instance.room_id).values_list('city_id', flat=True)
+    days = getattr(instance, '_previous_schedule_days', [])
+    refresh_schedule_days(*days, *[(city_id, instance.date) for city_id in city_ids])
+
+
+@receiver(pre_save, sender=Room)
+def invalidate_previous_room_schedule(sender, instance, **kwargs):
+    city_ids = []
+    if instance.pk:
+        city_ids = list(Room.objects.filter(pk=instance.pk).values_list('city_id', flat=True))
+        invalidate_schedule(*city_ids)
+    instance._previous_city_ids = city_ids
+
+
+@receiver([post_save, post_delete], sender=Room)
+def invalidate_room_schedule(sender, instance, **kwargs):
+    invalidate_schedule(instance.city_id)
+
+
+@receiver(post_save, sender=Room)
+def update_room_schedule_days(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    city_ids = {instance.city_id, *getattr(instance, '_previous_city_ids', [])}
+    if len(city_ids) > 1:
+        dates = set(Game.objects.filter(room=instance).values_list('date', flat=True))
+        refresh_schedule_days(*[(city_id, date) for city_id in city_ids for date in dates])
+
+
+@receiver([post_save, post_delete], sender=Address)
+def invalidate_address_schedule(sender, instance, **kwargs):
+    invalidate_schedule(instance.city_id, *Room.objects.filter(address=instance).values_list('city_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Master)
+def invalidate_master_schedule(sender, instance, **kwargs):
+    invalidate_schedule(*Game.objects.filter(master=instance).values_list('room__city_id', flat=True).distinct())
+
+
+@receiver([post_save, post_delete], sender=Systems)
+def invalidate_system_schedule(sender, instance, **kwargs):
+    invalidate_schedule(*Game.objects.filter(system=instance).values_list('room__city_id', flat=True).distinct())
+
+
+@receiver([post_save, post_delete], sender=City)
+def invalidate_city_schedule(sender, instance, **kwargs):
+    invalidate_schedule(instance.id)
+
+
+@receiver([post_save, post_delete], sender=City)
+def invalidate_city_registry(sender, instance, **kwargs):
+    invalidate_cities()
+
+
+@receiver([post_save, post_delete], sender=Game)
+@receiver([post_save, post_delete], sender=Room)
+@receiver([post_save, post_delete], sender=City)
+@receiver([post_save, post_delete], sender=Address)
+def invalidate_model_version(sender, **kwargs):
+    bump_versions(get_model_version_key(sender))
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_save, sender=Room)
+@receiver(post_save, sender=Master)
+@receiver(post_save, sender=Systems)
+@receiver(post_save, sender=Profile)
+def generate_image_derivatives(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    for field in IMAGE_FIELDS[sender.__name__]:
+        name = getattr(instance, field).name
+        transaction.on_commit(lambda name=name: ensure_derivatives(name))
+
+
+@receiver(post_save, sender=Profile)
+def refresh_avatars_on_upload(sender, instance, raw=False, **kwargs):
+    name = instance.avatars.name
+    if not raw and name.startswith(settings.AVATAR_FOLDER) and name.endswith('.png'):
+        if default_storage.url(name) not in get_avatar_urls():
+            transaction.on_commit(refresh_avatar_catalog)
@@ -38,17 +38,68 @@ function selectAvatar(element) {
     document.getElementById('selected-avatar-url').value = element.src;
 }
 
-$(document).ready(function() {
-    $(".img-more").click(function() {
-        var $container = $(this).closest(".card");
-        $container.find(".img-record").toggle("clip");
-        $container.find(".card-desc").toggle("clip");
-        $container.find(".more").toggle("clip");
+$(document).on("click", ".img-more", function() {
+    var $container = $(this).closest(".card");
+    $container.find(".img-record").toggle("clip");
+    $container.find(".card-desc").toggle("clip");
+    $container.find(".more").toggle("clip");
+});
+
+function getCookie(name) {
+    const cookie = document.cookie.split("; ").find(row => row.startsWith(name + "="));
+    return cookie ? decodeURIComponent(cookie.split("=")[1]) : null;
+}
+
+const BOOKING_LABELS = {
+    booked: "Отменить запись",
+    waitlist: "Покинуть лист ожидания",
+    canceled: "Записаться"
+};
+
+let bookingStatuses = {};
+
+function applyBookingStatuses() {
+    $(".booking-btn").each(function() {
+        const status = bookingStatuses[$(this).data("game")] || "canceled";
+        $(this).data("status", status).text(BOOKING_LABELS[status]);
+    });
+}
+
+function loadBookingStatuses() {
+    const $statuses = $("#booking-statuses");
+    if (!$statuses.length) {
+        return;
+    }
+    $.getJSON($statuses.data("url")).done(function(data) {
+        bookingStatuses = data;
+        applyBookingStatuses();
+    });
+}
+
+$(document).on("click", ".booking-btn", function() {
+    const $button = $(this);
+    const status = $button.data("status");
+    $button.prop("disabled", true);
+    $.ajax({
+        url: $button.data("url"),
+        method: "POST",
+        data: status === "booked" || status === "waitlist" ? {cancel: 1} : {},
+        headers: {"X-CSRFToken": getCookie("csrftoken")}
+    }).done(function(data) {
+        bookingStatuses[$button.data("game")] = data.status;
+        $button.data("status", data.status);
+        $button.text(BOOKING_LABELS[data.status]);
+        const $seats = $button.closest(".card").find(".card-info");
+        $seats.find(".img-seat").each(function(index) {
+            this.src = index < data.filled_seats ? $seats.data("fill") : $seats.data("empty");
+        });
+    }).always(function() {
+        $button.prop("disabled", false);
     });
 });
 
-$(document).ready(function(){
-    $(".owl-carousel").each(function() {
+function initCarousels() {
+    $(".owl-carousel:not(.owl-loaded)").each(function() {
         const $carousel = $(this);
         if ($carousel.children().length >= 1) {
             $carousel.owlCarousel({
@@ -65,6 +116,37 @@ $(document).ready(function(){
             });
         }
     });
+}
+
+let scheduleLoading = false;
+
+function loadMoreSchedule() {
+    var $more = $(".schedule-more");
+    if (scheduleLoading || !$more.length) {
+        return;
+    }
+    if ($(window).scrollTop() + $(window).height() < $more.offset().top - 600) {
+        return;
+    }
+    scheduleLoading = true;
+    $.get($more.data("url"))
+        .done(function(html) {
+            $more.replaceWith(html);
+            applyBookingStatuses();
+            initCarousels();
+            scheduleLoading = false;
+            loadMoreSchedule();
+        })
+        .fail(function() {
+            scheduleLoading = false;
+        });
+}
+
+$(document).ready(function(){
+    loadBookingStatuses();
+    initCarousels();
+    loadMoreSchedule();
+    $(window).scroll(loadMoreSchedule);
 });
 
 $(document).ready(function() {
@@ -0,0 +1,44 @@
+import logging
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from .assets import BUNDLES, COMPRESSED_EXTENSIONS, build_bundle, compress
+
+logger = logging.getLogger(__name__)
+
+
+class BundleManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            self.save_bundles(paths)
+        yield from super().post_process(paths, dry_run, **options)
+        if not dry_run:
+            for name in set(self.hashed_files.values()):
+                if name.endswith(COMPRESSED_EXTENSIONS):
+                    compress(self, name)
+
+    def save_bundles(self, paths):
+        def read(path):
+            storage, source = paths[path]
+            with storage.open(source) as file:
+                return file.read().decode('utf-8')
+
+        for name, sources in BUNDLES.items():
+            if self.exists(name):
+                self.delete(name)
+            self._save(name, ContentFile(build_bundle(name, sources, read).encode('utf-8')))
+            paths[name] = (self, name)
+
+    def url_converter(self, name, hashed_files, template=None):
+        converter = super().url_converter(name, hashed_files, template)
+
+        def convert(matchobj):
+            try:
+                return converter(matchobj)
+            except ValueError as error:
+                logger.warning('%s: %s', name, error)
+                return matchobj.group(0)
+
+        return convert
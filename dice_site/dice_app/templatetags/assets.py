@@ -0,0 +1,22 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from dice_app.assets import BUNDLES
+
+register = template.Library()
+
+
+@register.simple_tag
+def bundle(name):
+    sources = [(name, None)] if settings.STATIC_BUNDLES else BUNDLES[name]
+    tags = []
+    for path, media in sources:
+        if path.endswith('.css'):
+            tags.append(format_html('<link rel="stylesheet" href="{}"{}>', static(path),
+                                    format_html(' media="{}"', media) if media else ''))
+        else:
+            tags.append(format_html('<script src="{}"></script>', static(path)))
+    return mark_safe('\n'.join(tags))
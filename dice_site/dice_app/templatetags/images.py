@@ -0,0 +1,18 @@
+from django import template
+from django.core.files.storage import default_storage
+
+from dice_app.images import derivative_name, get_derivative_widths
+
+register = template.Library()
+
+
+@register.simple_tag
+def srcset(image, extension='webp', widths=()):
+    return ', '.join('%s %sw' % (default_storage.url(derivative_name(image.name, width, extension)), width)
+                     for width in widths)
+
+
+@register.inclusion_tag('responsive_image.html')
+def responsive_image(image, class_name='', sizes='100vw'):
+    return {'image': image, 'class_name': class_name, 'sizes': sizes,
+            'widths': get_derivative_widths(image.name) if image else []}
@@ -1,3 +1,1009 @@
-from django.test import TestCase
+import datetime
+import json
+import os
+import runpy
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.core.files.storage import default_storage
+from django.db import connection, connections
+from django.template import Context, Template, engines
+from django.template.response import SimpleTemplateResponse
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from PIL import Image
+
+from .archive import archive_games
+from .assets import BUNDLES, minify_css
+from .avatars import get_avatar_urls, refresh_avatar_catalog
+from .benchmark import seed, seed_users, run_benchmarks, check_budgets, benchmark_environment
+from .booking import book_game, cancel_booking
+from .checks import check_persistent_connections
+from .conflicts import audit_conflicts, find_conflicts
+from .cities import CITIES_REGISTRY_TIMEOUT, get_open_cities
+from .forms import CustomUserCreationForm, GameAdminForm
+from .hashers import ConfigurablePBKDF2PasswordHasher, MIN_PBKDF2_ITERATIONS
+from .images import derivative_name, ensure_derivatives, generate_derivatives, get_derivative_widths
+from .models import (City, Address, Room, Systems, Master, Game, ArchivedGame, GameSearch, Profile, Booking,
+                     ArchivedBooking, ScheduleDay)
+from .performance import UNRESOLVED_VIEW, histogram
+from .routers import REPLICA, PINNED_UNTIL_KEY, ReplicaRouter, replica_reads, render_with_replica_reads
+from .schedule import get_schedule_page, get_schedule_days, rebuild_schedule_days, refresh_schedule_days
+from .search import MySQLSearchBackend, SimpleSearchBackend, update_search_documents
+from .views import RecordsMoreView
+
+
+class RecordsViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.city = City.objects.create(city='Алматы')
+        cls.address = Address.objects.create(city=cls.city, address='Абая 1')
+        cls.room = Room.objects.create(name='Зал', city=cls.city, address=cls.address, photo='room/photo/room.png')
+        cls.system = Systems.objects.create(system='D&D', description='Описание', image='systems/image/dnd.png')
+        cls.master = Master.objects.create(name='Иван', last_name='Иванов', description='Описание',
+                                           photo='master/photo/ivan.png', city=cls.city)
+
+    def setUp(self):
+        cache.clear()
+
+    def create_games(self, count):
+        date = datetime.date.today() + datetime.timedelta(days=1)
+        for number in range(count):
+            Game.objects.create(name='Игра %s' % number, system=self.system, description='Описание',
+                                image='game/image/game.png', master=self.master, room=self.room,
+                                date=date + datetime.timedelta(days=number % 3), time=datetime.time(18, 0))
+
+    def get_records(self, url_name='records', **params):
+        self.client.cookies['selected_city'] = self.city.id
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_invalid_city_cookie_falls_back_to_default_city(self):
+        self.create_games(1)
+        for cookie in ['abc', '999999']:
+            self.client.cookies['selected_city'] = cookie
+            response = self.client.get(reverse('records'))
+            self.assertEqual(response.context['selected_city'], self.city)
+            self.assertContains(response, 'Игра 0')
+
+    def test_city_registry_follows_city_changes(self):
+        self.get_records()
+        self.city.close = True
+        self.city.save()
+        response = self.client.get(reverse('records'))
+        self.assertIsNone(response.context['selected_city'])
+        self.assertEqual(list(response.context['cities']), [])
+
+    def test_city_registry_expires_without_version_bump(self):
+        self.get_records()
+        City.objects.filter(pk=self.city.pk).update(city='Алма-Ата')
+        self.assertEqual(get_open_cities()[self.city.id].city, self.city.city)
+        with mock.patch('dice_app.cities.time.monotonic', return_value=time.monotonic() + CITIES_REGISTRY_TIMEOUT):
+            self.assertEqual(get_open_cities()[self.city.id].city, 'Алма-Ата')
+
+    def test_unknown_city_is_reported_as_form_error(self):
+        profile, = create_profiles(1)
+        self.client.force_login(profile.user)
+        for url_name in ['profile', 'records']:
+            response = self.client.post(reverse(url_name), {'city_id': 999999})
+            self.assertContains(response, 'Выбранный город недоступен')
+            self.assertNotIn('selected_city', response.cookies)
+
+    def test_schedule_groups_games_by_day(self):
+        self.create_games(5)
+        response, _ = self.get_records()
+        schedule = response.context['schedule']
+        self.assertEqual([count for _, count, _ in schedule], [2, 2, 1])
+        self.assertEqual(sum(len(games) for _, _, games in schedule), 5)
+
+    def test_each_game_is_rendered_once_under_its_day(self):
+        today = datetime.date.today()
+        for name, days, hour in [('Поздняя', 1, 20), ('Вчерашняя', -1, 12), ('Завтрашняя', 2, 10),
+                                 ('Ранняя', 1, 11)]:
+            Game.objects.create(name=name, system=self.system, description='Описание', image='game/image/game.png',
+                                master=self.master, room=self.room, date=today + datetime.timedelta(days=days),
+                                time=datetime.time(hour, 0))
+        response, _ = self.get_records()
+        schedule = response.context['schedule']
+        self.assertEqual([(date, [game.name for game in games]) for date, _, games in schedule],
+                         [(today + datetime.timedelta(days=1), ['Ранняя', 'Поздняя']),
+                          (today + datetime.timedelta(days=2), ['Завтрашняя'])])
+        content = response.content.decode()
+        self.assertEqual(content.count('class="section-record"'), 2)
+        self.assertNotIn('Вчерашняя', content)
+        self.assertLess(content.index('Ранняя'), content.index('Поздняя'))
+        self.assertLess(content.index('Поздняя'), content.index('Завтрашняя'))
+        self.assertEqual(content.count('Поздняя'), 1)
+
+    def test_query_count_does_not_depend_on_games(self):
+        self.get_records()
+        self.create_games(1)
+        _, queries_one = self.get_records()
+        self.create_games(20)
+        _, queries_many = self.get_records()
+        self.assertEqual(queries_one, queries_many)
+        self.assertLessEqual(queries_many, 2)
+
+    def test_schedule_is_cached_until_games_change(self):
+        self.create_games(1)
+        _, queries_miss = self.get_records()
+        response, queries_hit = self.get_records()
+        self.assertLess(queries_hit, queries_miss)
+        self.assertContains(response, 'Игра 0')
+        game = Game.objects.get()
+        game.name = 'Новая игра'
+        game.save()
+        response, _ = self.get_records()
+        self.assertContains(response, 'Новая игра')
+
+    def test_schedule_cache_follows_master_changes(self):
+        self.create_games(1)
+        self.get_records()
+        self.master.name = 'Пётр'
+        self.master.save()
+        response, _ = self.get_records()
+        self.assertContains(response, 'Мастер: Пётр')
+
+    def test_schedule_skips_past_and_canceled_games(self):
+        self.create_games(3)
+        Game.objects.filter(name='Игра 0').update(canceled=True)
+        Game.objects.filter(name='Игра 1').update(date=datetime.date.today() - datetime.timedelta(days=1))
+        response, _ = self.get_records()
+        games = [game for _, _, day_games in response.context['schedule'] for game in day_games]
+        self.assertEqual([game.name for game in games], ['Игра 2'])
+
+    def test_schedule_matches_city_exactly(self):
+        other_city = City.objects.create(id=int(str(self.city.id) * 2), city='Астана')
+        other_address = Address.objects.create(city=other_city, address='Абая 2')
+        other_room = Room.objects.create(name='Зал 2', city=other_city, address=other_address,
+                                         photo='room/photo/room.png')
+        self.create_games(1)
+        Game.objects.update(room=other_room)
+        response, _ = self.get_records()
+        self.assertEqual(response.context['schedule'], [])
+
+    def test_schedule_page_completes_last_day(self):
+        self.create_games(5)
+        schedule, cursor = get_schedule_page(Game.objects.all(), size=3)
+        self.assertEqual([count for _, count, _ in schedule], [2, 2])
+        self.assertIsNotNone(cursor)
+        schedule, cursor = get_schedule_page(Game.objects.all(), cursor, size=3)
+        self.assertEqual([count for _, count, _ in schedule], [1])
+        self.assertIsNone(cursor)
+
+    def test_records_more_returns_days_after_cursor(self):
+        self.create_games(5)
+        _, cursor = get_schedule_page(Game.objects.all(), size=3)
+        response, _ = self.get_records('records_more', cursor=cursor)
+        self.assertEqual([count for _, count, _ in response.context['schedule']], [1])
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_records_more_reads_day_counts_from_summary(self):
+        self.create_games(3)
+        ScheduleDay.objects.filter(city=self.city).update(games_count=7)
+        response, _ = self.get_records('records_more')
+        self.assertTrue(RecordsMoreView.view_is_async)
+        self.assertEqual([count for _, count, _ in response.context['schedule']], [7, 7, 7])
+        response, _ = self.get_records('records_more', search_query='Игра')
+        self.assertEqual([count for _, count, _ in response.context['schedule']], [1, 1, 1])
+
+    def test_unchanged_schedule_is_not_modified(self):
+        self.create_games(2)
+        self.get_records()
+        response, _ = self.get_records()
+        etag = response['ETag']
+        self.assertIn('private', response['Cache-Control'])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('records'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(len(queries), 1)
+        Game.objects.filter(name='Игра 0').delete()
+        response = self.client.get(reverse('records'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_follows_rows_changed_elsewhere(self):
+        self.create_games(1)
+        self.get_records()
+        response, _ = self.get_records()
+        etag = response['ETag']
+        Master.objects.filter(pk=self.master.pk).update(updated_at=timezone.now() + datetime.timedelta(seconds=1))
+        response = self.client.get(reverse('records'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_free_seats_only_filter(self):
+        self.create_games(2)
+        Game.objects.filter(name='Игра 0').update(filled_seats=6, free_seats=0)
+        response, _ = self.get_records()
+        self.assertContains(response, 'class="img-seat"', count=12)
+        response, _ = self.get_records(free_seats='1')
+        games = [game for _, _, day_games in response.context['schedule'] for game in day_games]
+        self.assertEqual([game.name for game in games], ['Игра 1'])
+        self.assertContains(response, 'class="img-seat"', count=6)
+
+    def test_records_more_rejects_invalid_cursor(self):
+        self.client.cookies['selected_city'] = self.city.id
+        response = self.client.get(reverse('records_more'), {'cursor': 'invalid'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ApiTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.city = City.objects.create(city='Алматы')
+        cls.other_city = City.objects.create(city='Астана')
+        address = Address.objects.create(city=cls.city, address='Абая 1')
+        cls.room = Room.objects.create(name='Зал', city=cls.city, address=address, photo='room/photo/room.png')
+        system = Systems.objects.create(system='D&D', description='Описание', image='systems/image/dnd.png')
+        master = Master.objects.create(name='Иван', last_name='Иванов', description='Описание',
+                                       photo='master/photo/ivan.png', city=cls.city)
+        today = datetime.date.today()
+        Game.objects.bulk_create([
+            Game(name='Игра %s' % number, system=system, description='Описание', image='game/image/game.png',
+                 master=master, room=cls.room, date=today + datetime.timedelta(days=number - 1),
+                 time=datetime.time(18, 0))
+            for number in range(6)])
+
+    def get_api(self, resource, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('api', args=[resource]), params)
+        return response, json.loads(response.content), len(queries)
+
+    def test_games_are_paginated_by_keyset(self):
+        response, data, queries = self.get_api('games', city=self.city.id, limit=3, fields='name,date')
+        self.assertEqual(queries, 1)
+        self.assertIn('max-age=%s' % settings.API_CACHE_TIMEOUT, response['Cache-Control'])
+        self.assertEqual([game['name'] for game in data['results']], ['Игра 1', 'Игра 2', 'Игра 3'])
+        self.assertEqual(set(data['results'][0]), {'name', 'date'})
+        _, data, queries = self.get_api('games', city=self.city.id, limit=3, cursor=data['next'])
+        self.assertEqual(queries, 1)
+        self.assertEqual([game['name'] for game in data['results']], ['Игра 4', 'Игра 5'])
+        self.assertEqual(data['results'][0]['image'], default_storage.url('game/image/game.png'))
+        self.assertIsNone(data['next'])
+
+    def test_filters(self):
+        today = datetime.date.today()
+        _, data, _ = self.get_api('games', date_from=today - datetime.timedelta(days=1), date_to=today)
+        self.assertEqual([game['name'] for game in data['results']], ['Игра 0', 'Игра 1'])
+        _, data, _ = self.get_api('games', city=self.other_city.id)
+        self.assertEqual(data['results'], [])
+        _, data, _ = self.get_api('rooms', city=self.city.id)
+        self.assertEqual(data['results'][0]['address'], 'Абая 1')
+        _, data, _ = self.get_api('cities')
+        self.assertEqual([city['city'] for city in data['results']], ['Алматы', 'Астана'])
+
+    def test_invalid_requests(self):
+        for params in [{'fields': 'name,password'}, {'cursor': 'invalid'}, {'date_from': 'вчера'}, {'limit': '0'}]:
+            response, data, _ = self.get_api('games', **params)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('error', data)
+        response = self.client.get(reverse('api', args=['users']))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(PERFORMANCE_INSTRUMENTATION='1')
+    def test_page_query_is_measured(self):
+        with self.assertLogs('dice_app.performance', 'INFO') as logs:
+            self.get_api('games', limit=3)
+        self.assertEqual(json.loads(logs.output[-1].split(':', 2)[2])['queries'], 1)
+
+
+class SearchTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        city = City.objects.create(city='Алматы')
+        address = Address.objects.create(city=city, address='Абая 1')
+        room = Room.objects.create(name='Зал', city=city, address=address, photo='room/photo/room.png')
+        system = Systems.objects.create(system='Pathfinder', description='Описание', image='systems/image/pf.png')
+        cls.master = Master.objects.create(name='Иван', last_name='Иванов', description='Описание',
+                                           photo='master/photo/ivan.png', city=city)
+        for name in ['Драконы', 'Драконы севера']:
+            Game.objects.create(name=name, system=system, description='Описание', image='game/image/game.png',
+                                master=cls.master, room=room, date=datetime.date.today(), time=datetime.time(18, 0))
+
+    def search(self, query):
+        return list(SimpleSearchBackend().search(Game.objects.all(), query).order_by('id'))
+
+    def test_search_matches_related_fields(self):
+        self.assertEqual(len(self.search('иван')), 2)
+        self.assertEqual(len(self.search('абая')), 2)
+        self.assertEqual(self.search('гоблины'), [])
+
+    def test_search_matches_any_term(self):
+        self.assertEqual([game.name for game in self.search('драконы севера')], ['Драконы', 'Драконы севера'])
+        self.assertEqual([game.name for game in self.search('гоблины севера')], ['Драконы севера'])
+
+    def test_mysql_match_is_not_selected(self):
+        query = str(MySQLSearchBackend().search(Game.objects.all(), 'драконы').query)
+        select, where = query.split(' WHERE ')
+        self.assertNotIn('MATCH', select)
+        self.assertIn('MATCH', where)
+
+    def test_search_document_follows_related_changes(self):
+        self.master.name = 'Пётр'
+        self.master.save()
+        self.assertEqual(len(self.search('пётр')), 2)
+        self.assertIn('пётр иванов', GameSearch.objects.first().document)
+
+    def test_documents_update_without_upsert_target(self):
+        Game.objects.update(name='Гоблины')
+        features = connection.features
+        with mock.patch.object(features, 'supports_update_conflicts_with_target', False), \
+                mock.patch.object(features, 'supports_update_conflicts', False):
+            update_search_documents(Game.objects.all())
+        self.assertEqual(len(self.search('гоблины')), 2)
+        self.assertEqual(GameSearch.objects.count(), 2)
+
+
+def create_game(total_seats=6):
+    city = City.objects.create(city='Алматы')
+    address = Address.objects.create(city=city, address='Абая 1')
+    room = Room.objects.create(name='Зал', city=city, address=address, photo='room/photo/room.png')
+    system = Systems.objects.create(system='D&D', description='Описание', image='systems/image/dnd.png')
+    master = Master.objects.create(name='Иван', last_name='Иванов', description='Описание',
+                                   photo='master/photo/ivan.png', city=city)
+    return Game.objects.create(name='Игра', system=system, description='Описание', image='game/image/game.png',
+                               master=master, room=room, date=datetime.date.today(), time=datetime.time(18, 0),
+                               total_seats=total_seats)
+
+
+def create_profiles(count):
+    profiles = []
+    for number in range(count):
+        user = User.objects.create_user(username='player%s' % number, email='player%s@dice.kz' % number)
+        profiles.append(Profile.objects.create(user=user))
+    return profiles
+
+
+class BookingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.game = create_game(total_seats=1)
+        cls.first, cls.second = create_profiles(2)
+
+    def test_booking_fills_seats_then_waitlists(self):
+        self.assertEqual(book_game(self.first, self.game.id).status, Booking.BOOKED)
+        self.assertEqual(book_game(self.first, self.game.id).status, Booking.BOOKED)
+        self.assertEqual(book_game(self.second, self.game.id).status, Booking.WAITLIST)
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.filled_seats, 1)
+        self.assertEqual(self.game.free_seats, 0)
+
+    def test_cancel_promotes_waitlist(self):
+        book_game(self.first, self.game.id)
+        book_game(self.second, self.game.id)
+        self.assertEqual(cancel_booking(self.first, self.game.id).status, Booking.CANCELED)
+        self.assertEqual(Booking.objects.get(profile=self.second).status, Booking.BOOKED)
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.filled_seats, 1)
+        cancel_booking(self.second, self.game.id)
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.filled_seats, 0)
+        self.assertEqual(self.game.free_seats, 1)
+
+    def test_free_seats_filters(self):
+        game = Game.objects.create(name='Игра 2', system=self.game.system, description='Описание',
+                                   image='game/image/game.png', master=self.game.master, room=self.game.room,
+                                   date=self.game.date, time=self.game.time, total_seats=6, filled_seats=5)
+        self.assertEqual(game.free_seats, 1)
+        game.filled_seats = 7
+        game.save()
+        self.assertEqual(Game.objects.get(pk=game.pk).free_seats, 0)
+        self.assertEqual(list(Game.objects.with_free_seats()), [self.game])
+        self.assertEqual(list(Game.objects.almost_full()), [self.game])
+
+    def test_booking_endpoint(self):
+        url = reverse('booking', args=[self.game.id])
+        self.assertEqual(self.client.post(url).status_code, 403)
+        self.client.force_login(self.first.user)
+        self.assertEqual(self.client.post(url).json(), {'status': Booking.BOOKED, 'filled_seats': 1})
+        self.assertEqual(self.client.post(url, {'cancel': 1}).json(), {'status': Booking.CANCELED, 'filled_seats': 0})
+        self.assertEqual(self.client.post(reverse('booking', args=[0])).status_code, 404)
+
+    def test_booking_statuses_are_served_per_user(self):
+        url = reverse('booking_statuses')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        book_game(self.first, self.game.id)
+        book_game(self.second, self.game.id)
+        self.client.force_login(self.second.user)
+        response = self.client.get(url)
+        self.assertEqual(response.json(), {str(self.game.id): Booking.WAITLIST})
+        self.assertIn('private', response['Cache-Control'])
+        self.client.force_login(self.first.user)
+        self.assertEqual(self.client.get(url).json(), {str(self.game.id): Booking.BOOKED})
+        self.assertContains(self.client.get(reverse('records')), 'data-url="%s"' % url)
+        cancel_booking(self.first, self.game.id)
+        self.assertEqual(self.client.get(url).json(), {})
+
+
+class ConflictTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.game = create_game()
+        cls.other_master = Master.objects.create(name='Пётр', last_name='Петров', description='Описание',
+                                                 photo='master/photo/petr.png', city=cls.game.room.city)
+
+    def create_game(self, time, date=None, **fields):
+        fields = {'room': self.game.room, 'master': self.other_master, **fields}
+        return Game.objects.create(name='Игра %s' % time, system=self.game.system, description='Описание',
+                                   image='game/image/game.png', date=date or self.game.date, time=time, **fields)
+
+    def test_find_conflicts(self):
+        overlapping = self.create_game(datetime.time(21, 0))
+        self.create_game(datetime.time(22, 0), room=Room.objects.create(
+            name='Зал 2', city=self.game.room.city, address=self.game.room.address, photo='room/photo/room.png'))
+        self.create_game(datetime.time(14, 0))
+        self.create_game(datetime.time(12, 0), canceled=True)
+        self.assertEqual(find_conflicts(self.game), [overlapping])
+        late = self.create_game(datetime.time(23, 30), master=self.game.master, room=overlapping.room)
+        early = self.create_game(datetime.time(1, 0), date=self.game.date + datetime.timedelta(days=1),
+                                 master=self.game.master)
+        self.assertEqual(find_conflicts(early), [late])
+        with self.assertNumQueries(1):
+            find_conflicts(self.game)
+
+    def test_admin_rejects_overlapping_game(self):
+        self.create_game(datetime.time(20, 0))
+        data = {'name': 'Игра', 'system': self.game.system.id, 'type_game': 'Ваншот', 'description': 'Описание',
+                'price': 5000, 'master': self.other_master.id, 'room': self.game.room.id, 'date': self.game.date,
+                'time': '10:00', 'duration': 240, 'total_seats': 6, 'filled_seats': 0}
+        form = GameAdminForm(data, {'image': SimpleUploadedFile('game.png', b'', 'image/png')})
+        form.is_valid()
+        self.assertNotIn('__all__', form.errors)
+        form = GameAdminForm({**data, 'time': '19:00'}, instance=self.game)
+        self.assertIn('та же комната', form.errors['__all__'][0])
+
+    def test_audit(self):
+        overlapping = self.create_game(datetime.time(21, 0))
+        self.create_game(datetime.time(21, 30), master=self.game.master, room=Room.objects.create(
+            name='Зал 2', city=self.game.room.city, address=self.game.room.address, photo='room/photo/room.png'))
+        self.assertEqual(list(audit_conflicts('room_id')), [(self.game.room_id, self.game.id, overlapping.id)])
+        self.assertEqual(len(list(audit_conflicts('master_id'))), 1)
+        with self.assertRaises(CommandError):
+            call_command('audit_schedule_conflicts', stdout=StringIO())
+
+
+class ScheduleDayTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.game = create_game(total_seats=2)
+        cls.profile, = create_profiles(1)
+
+    def get_day(self, city_id=None):
+        return ScheduleDay.objects.get(city_id=city_id or self.game.room.city_id, date=self.game.date)
+
+    def test_day_follows_games_and_bookings(self):
+        self.assertEqual((self.get_day().games_count, self.get_day().free_seats), (1, 2))
+        Game.objects.create(name='Вторая', system=self.game.system, description='Описание', master=self.game.master,
+                            image='game/image/game.png', room=self.game.room, date=self.game.date,
+                            time=datetime.time(20, 0), total_seats=4, filled_seats=1)
+        self.assertEqual((self.get_day().games_count, self.get_day().free_seats), (2, 5))
+        book_game(self.profile, self.game.id)
+        self.assertEqual(self.get_day().free_seats, 4)
+        cancel_booking(self.profile, self.game.id)
+        self.assertEqual(self.get_day().free_seats, 5)
+        self.game.canceled = True
+        self.game.save()
+        self.assertEqual((self.get_day().games_count, self.get_day().free_seats), (1, 3))
+
+    def test_bookings_apply_seat_deltas(self):
+        ScheduleDay.objects.filter(pk=self.get_day().pk).update(free_seats=10)
+        with self.assertNumQueries(12 if connection.features.has_select_for_update else 13):
+            book_game(self.profile, self.game.id)
+        self.assertEqual(self.get_day().free_seats, 9)
+        cancel_booking(self.profile, self.game.id)
+        self.assertEqual(self.get_day().free_seats, 10)
+
+    def test_day_follows_moved_and_deleted_games(self):
+        city = City.objects.create(city='Астана')
+        self.game.room.city = city
+        self.game.room.save()
+        self.assertFalse(ScheduleDay.objects.filter(city=self.game.master.city).exists())
+        self.assertEqual(self.get_day(city.id).games_count, 1)
+        self.game.delete()
+        self.assertFalse(ScheduleDay.objects.exists())
+
+    def test_rebuild(self):
+        ScheduleDay.objects.all().delete()
+        self.assertEqual(rebuild_schedule_days(), 1)
+        days = get_schedule_days(self.game.room.city_id, self.game.date)
+        self.assertEqual([(day.date, day.games_count, day.free_seats) for day in days], [(self.game.date, 1, 2)])
+
+
+class ProfileLoadingTest(TestCase):
+
+    def test_profile_is_loaded_with_user(self):
+        create_game()
+        profile, = create_profiles(1)
+        self.client.force_login(profile.user)
+        self.client.cookies['selected_city'] = City.objects.get().id
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('change_password'))
+        self.assertEqual(response.context['profile'], profile)
+        profile_queries = [query['sql'] for query in queries if 'FROM "dice_app_profile"' in query['sql']]
+        self.assertEqual(profile_queries, [])
+        self.assertEqual(len([query for query in queries if 'JOIN "dice_app_profile"' in query['sql']]), 1)
+
+    def test_sessions_of_the_default_backend_stay_valid(self):
+        profile, = create_profiles(1)
+        self.client.force_login(profile.user, backend='django.contrib.auth.backends.ModelBackend')
+        response = self.client.get(reverse('change_password'))
+        self.assertEqual(response.wsgi_request.user, profile.user)
+
+
+class RegistrationTest(TestCase):
+
+    def register(self, username, email):
+        return self.client.post(reverse('records'), {
+            'register-first_name': 'Игрок', 'register-username': username, 'register-email': email,
+            'register-password1': 'Strong_pass42', 'register-password2': 'Strong_pass42', 'register-btn': ''})
+
+    def test_register_creates_user_and_profile(self):
+        response = self.register('player_one', 'Player@Dice.kz')
+        user = User.objects.get(username='player_one')
+        self.assertEqual(user.email, 'player@dice.kz')
+        self.assertTrue(Profile.objects.filter(user=user).exists())
+        self.assertEqual(response.wsgi_request.user, user)
+
+    def test_duplicates_are_rejected_by_database(self):
+        User.objects.create_user(username='Player_One', email='player@dice.kz')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.register('player_one', 'other@dice.kz')
+        self.assertFalse([query for query in queries if 'LIKE' in query['sql'] or 'UPPER' in query['sql']])
+        self.assertIn('логином', str(response.context['form_register'].errors['username']))
+        response = self.register('player_two', 'PLAYER@dice.kz')
+        self.assertIn('email', str(response.context['form_register'].errors['email']))
+        self.assertEqual(User.objects.count(), 1)
+        self.assertFalse(Profile.objects.exists())
+
+    def test_errors_are_mapped_by_constraint_name(self):
+        User.objects.create_user(username='email_fan', email='fan@dice.kz')
+        response = self.register('EMAIL_FAN', 'other@dice.kz')
+        self.assertIn('username', response.context['form_register'].errors)
+        self.assertNotIn('email', response.context['form_register'].errors)
+
+    def test_unknown_constraint_names_fall_back_to_lookups(self):
+        User.objects.create_user(username='email_fan', email='fan@dice.kz')
+        with mock.patch.object(CustomUserCreationForm, 'unique_constraints', {}):
+            response = self.register('Email_Fan', 'other@dice.kz')
+            self.assertIn('username', response.context['form_register'].errors)
+            response = self.register('email_fan_two', 'FAN@dice.kz')
+            self.assertIn('email', response.context['form_register'].errors)
+
+    def test_email_is_checked_without_expression_indexes(self):
+        User.objects.create_user(username='player_one', email='player@dice.kz')
+        with mock.patch.object(connection.features, 'supports_expression_indexes', False):
+            response = self.register('player_two', 'PLAYER@dice.kz')
+        self.assertIn('email', str(response.context['form_register'].errors['email']))
+
+    def test_email_validation_does_not_mark_a_write(self):
+        form = CustomUserCreationForm()
+        form.cleaned_data = {'email': 'Player@Dice.kz'}
+        with mock.patch.object(ReplicaRouter, 'db_for_write', return_value='default') as db_for_write, \
+                mock.patch.object(connection.features, 'supports_expression_indexes', False):
+            self.assertEqual(form.clean_email(), 'player@dice.kz')
+        db_for_write.assert_not_called()
+
+    @override_settings(PASSWORD_ITERATIONS=320000)
+    def test_login_upgrades_password_hash(self):
+        user = User.objects.create_user(username='player', password='Strong_pass42')
+        user.password = PBKDF2PasswordHasher().encode('Strong_pass42', 'salt', 600000)
+        user.save()
+        self.assertTrue(self.client.login(username='player', password='Strong_pass42'))
+        user.refresh_from_db()
+        self.assertEqual(user.password.split('$')[1], '320000')
+        with self.settings(PASSWORD_ITERATIONS=1000):
+            self.assertEqual(ConfigurablePBKDF2PasswordHasher().iterations, MIN_PBKDF2_ITERATIONS)
+
+
+class PerformanceMiddlewareTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.game = create_game()
+
+    def setUp(self):
+        cache.clear()
+        histogram.clear()
+        self.client.cookies['selected_city'] = self.game.room.city_id
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse('records'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_template_timer_is_installed_only_while_enabled(self):
+        with override_settings(PERFORMANCE_INSTRUMENTATION='1'):
+            self.client.get(reverse('records'))
+            self.assertTrue(getattr(Template.render, 'timed', False))
+        self.assertFalse(getattr(Template.render, 'timed', False))
+
+    @override_settings(PERFORMANCE_INSTRUMENTATION='1')
+    def test_unresolved_paths_share_one_bucket(self):
+        with self.assertLogs('dice_app.performance', 'INFO'):
+            for path in ['/missing-1/', '/missing-2/', '/wp-login.php']:
+                self.client.get(path)
+        self.assertEqual([row['name'] for row in histogram.summary()], [UNRESOLVED_VIEW])
+
+    @override_settings(PERFORMANCE_INSTRUMENTATION='1')
+    def test_server_timing_and_histogram(self):
+        with self.assertLogs('dice_app.performance', 'INFO') as logs:
+            response = self.client.get(reverse('records'))
+        for metric in ['db;dur=', 'view;dur=', 'tpl;dur=', 'total;dur=']:
+            self.assertIn(metric, response['Server-Timing'])
+        self.assertIn('"view": "records"', logs.output[-1])
+        self.assertEqual([row['name'] for row in histogram.summary()], ['records'])
+
+    @override_settings(PERFORMANCE_INSTRUMENTATION='1')
+    def test_template_time_is_measured_for_plain_responses(self):
+        with self.assertLogs('dice_app.performance', 'INFO') as logs:
+            self.client.post(reverse('records'), {'login-btn': '1', 'login-username': 'x'})
+        self.assertGreater(json.loads(logs.output[-1].split(':', 2)[2])['tpl_ms'], 0)
+
+    @override_settings(PERFORMANCE_INSTRUMENTATION='1', SLOW_QUERY_MS=0)
+    def test_slow_queries_are_logged_with_origin(self):
+        with self.assertLogs('dice_app.performance', 'WARNING') as logs:
+            self.client.get(reverse('records'))
+        self.assertTrue(any('"slow_query"' in line and 'dice_app/' in line for line in logs.output))
+
+    @override_settings(PERFORMANCE_INSTRUMENTATION='1')
+    def test_admin_page_is_staff_only(self):
+        url = reverse('admin:performance')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@dice.kz', 'password'))
+        self.client.get(reverse('records'))
+        self.assertContains(self.client.get(url), 'records')
+
+
+class GameAdminTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.game = create_game()
+        cls.admin = User.objects.create_superuser('admin', 'admin@dice.kz', 'password')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_search_by_date_and_time(self):
+        url = reverse('admin:dice_app_game_changelist')
+        date = self.game.date.strftime('%d.%m.%Y')
+        self.assertEqual(self.client.get(url, {'q': date}).context['cl'].result_count, 1)
+        self.assertEqual(self.client.get(url, {'q': date + ' 18:00'}).context['cl'].result_count, 1)
+        self.assertEqual(self.client.get(url, {'q': date + ' 19:00'}).context['cl'].result_count, 0)
+        self.assertEqual(self.client.get(url, {'q': 'Игра'}).context['cl'].result_count, 1)
+
+    def test_cached_filters(self):
+        url = reverse('admin:dice_app_game_changelist')
+        response = self.client.get(url, {'room': self.game.room_id, 'seats': 'free'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+        response = self.client.get(url, {'seats': 'full'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+    def test_cached_filter_choices_follow_saved_rows(self):
+        url = reverse('admin:dice_app_game_changelist')
+        self.client.get(url)
+        room = Room.objects.create(name='Новый зал', city=self.game.room.city, address=self.game.room.address,
+                                   photo='room/photo/room.png')
+        self.assertContains(self.client.get(url), 'Новый зал')
+        room.delete()
+        self.assertNotContains(self.client.get(url), 'Новый зал')
+
+    def test_filled_seats_are_not_editable(self):
+        self.assertIsNone(self.client.get(reverse('admin:dice_app_game_changelist')).context['cl'].formset)
+        response = self.client.get(reverse('admin:dice_app_game_change', args=[self.game.pk]))
+        self.assertNotIn('filled_seats', response.context['adminform'].form.fields)
+
+
+class ArchiveTest(TestCase):
+
+    def test_archive_moves_old_games(self):
+        game = create_game()
+        old_date = datetime.date.today() - datetime.timedelta(days=400)
+        for number in range(3):
+            Game.objects.create(name='Старая игра %s' % number, system=game.system, description='Описание',
+                                image='game/image/game.png', master=game.master, room=game.room, date=old_date,
+                                time=datetime.time(18, 0), filled_seats=4)
+        self.assertEqual(archive_games(365, batch_size=2), 3)
+        self.assertEqual(list(Game.objects.all()), [game])
+        archived = ArchivedGame.objects.select_related('master', 'room').order_by('original_id')
+        self.assertEqual([(item.name, item.master, item.room, item.date, item.filled_seats) for item in archived],
+                         [('Старая игра %s' % number, game.master, game.room, old_date, 4) for number in range(3)])
+
+    def test_archive_keeps_bookings_and_refreshes_schedule_once(self):
+        game = create_game()
+        old_game = Game.objects.create(name='Старая игра', system=game.system, description='Описание',
+                                       image='game/image/game.png', master=game.master, room=game.room,
+                                       date=datetime.date.today() - datetime.timedelta(days=400),
+                                       time=datetime.time(18, 0))
+        profiles = create_profiles(3)
+        for profile in profiles:
+            Booking.objects.create(profile=profile, game=old_game)
+        self.assertTrue(ScheduleDay.objects.filter(date=old_game.date).exists())
+        with mock.patch('dice_app.archive.refresh_schedule_days', wraps=refresh_schedule_days) as refresh, \
+                mock.patch('dice_app.signals.refresh_schedule_days') as signal_refresh:
+            self.assertEqual(archive_games(365, batch_size=2), 1)
+        refresh.assert_called_once_with((game.room.city_id, old_game.date))
+        signal_refresh.assert_not_called()
+        self.assertFalse(ScheduleDay.objects.filter(date=old_game.date).exists())
+        self.assertFalse(Booking.objects.exists())
+        archived = ArchivedBooking.objects.select_related('game').order_by('profile_id')
+        self.assertEqual([(item.profile, item.game.original_id, item.status) for item in archived],
+                         [(profile, old_game.id, Booking.BOOKED) for profile in profiles])
+
+    def test_archive_admin_is_read_only(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@dice.kz', 'password'))
+        self.assertEqual(self.client.get(reverse('admin:dice_app_archivedgame_changelist')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('admin:dice_app_archivedgame_add')).status_code, 403)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class BookingConcurrencyTest(TransactionTestCase):
+
+    def book(self, profile):
+        try:
+            return book_game(profile, self.game.id).status
+        finally:
+            connections.close_all()
+
+    def test_concurrent_bookings_never_overbook(self):
+        self.game = create_game(total_seats=5)
+        profiles = create_profiles(30)
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            statuses = list(executor.map(self.book, profiles))
+        self.game.refresh_from_db()
+        self.assertEqual(statuses.count(Booking.BOOKED), 5)
+        self.assertEqual(statuses.count(Booking.WAITLIST), 25)
+        self.assertEqual(self.game.filled_seats, 5)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ReplicaRoutingTest(TransactionTestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.TemporaryDirectory()
+        connections.settings[REPLICA] = {**connections.settings['default'], 'ENGINE': 'django.db.backends.sqlite3',
+                                         'NAME': os.path.join(cls.replica_dir.name, 'replica.sqlite3'),
+                                         'OPTIONS': {}}
+        call_command('migrate', database=REPLICA, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        cls.replica_dir.cleanup()
+
+    def setUp(self):
+        cache.clear()
+        City.objects.create(city='Основной')
+        City.objects.using(REPLICA).create(city='Реплика')
+
+    def get_cities(self):
+        response = self.client.get(reverse('records'))
+        return [city.city for city in response.context['cities']]
+
+    def test_benchmarks_read_from_primary(self):
+        with benchmark_environment():
+            self.assertEqual(self.get_cities(), ['Основной'])
+
+    def test_records_read_from_replica(self):
+        self.assertEqual(self.get_cities(), ['Реплика'])
+
+    def test_deferred_render_reads_from_replica(self):
+        template = engines['django'].from_string('{% for city in cities %}{{ city.city }}{% endfor %}')
+        response = render_with_replica_reads(SimpleTemplateResponse(template, {'cities': City.objects.all()}))
+        self.assertFalse(response.is_rendered)
+        self.assertEqual(response.render().content.decode(), 'Реплика')
+
+    def test_session_is_pinned_to_primary_after_write(self):
+        User.objects.create_user(username='player', email='player@dice.kz', password='secret-pass-1')
+        self.client.post(reverse('records'), {'login-username': 'player', 'login-password': 'secret-pass-1',
+                                              'login-btn': ''})
+        self.assertGreater(self.client.session[PINNED_UNTIL_KEY], time.time())
+        cache.clear()
+        self.assertEqual(self.get_cities(), ['Основной'])
+
+
+class ReplicaFallbackTest(SimpleTestCase):
+
+    def test_reads_use_primary_without_replica(self):
+        with replica_reads():
+            self.assertIsNone(ReplicaRouter().db_for_read(City))
+        self.assertEqual(ReplicaRouter().db_for_write(City), 'default')
+
+
+class ConnectionSettingsTest(SimpleTestCase):
+
+    def load_settings(self, **environ):
+        with mock.patch.dict(os.environ, environ), mock.patch('dotenv.load_dotenv'):
+            if 'CONN_MAX_AGE_DB' not in environ:
+                os.environ.pop('CONN_MAX_AGE_DB', None)
+            return runpy.run_path(os.path.join(settings.BASE_DIR, 'dice_site', 'settings.py'))
+
+    def test_conn_max_age_is_read_from_environment(self):
+        self.assertEqual(self.load_settings()['CONN_MAX_AGE'], 60)
+        self.assertEqual(self.load_settings(CONN_MAX_AGE_DB='0')['CONN_MAX_AGE'], 0)
+        self.assertIsNone(self.load_settings(CONN_MAX_AGE_DB='None')['DATABASES']['default']['CONN_MAX_AGE'])
+        self.assertFalse(self.load_settings(CONN_HEALTH_CHECKS_DB='0')['DATABASES']['default']['CONN_HEALTH_CHECKS'])
+
+    def test_asgi_disables_persistent_connections_by_default(self):
+        with mock.patch.dict(os.environ), mock.patch('dotenv.load_dotenv'):
+            os.environ.pop('CONN_MAX_AGE_DB', None)
+            runpy.run_path(os.path.join(settings.BASE_DIR, 'dice_site', 'asgi.py'))
+            self.assertEqual(os.environ['CONN_MAX_AGE_DB'], '0')
+            os.environ['CONN_MAX_AGE_DB'] = '30'
+            runpy.run_path(os.path.join(settings.BASE_DIR, 'dice_site', 'asgi.py'))
+            self.assertEqual(os.environ['CONN_MAX_AGE_DB'], '30')
+
+    def test_unlimited_connections_need_health_checks(self):
+        databases = {'default': {'CONN_MAX_AGE': None, 'CONN_HEALTH_CHECKS': False},
+                     'replica': {'CONN_MAX_AGE': None, 'CONN_HEALTH_CHECKS': True},
+                     'archive': {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': False}}
+        with mock.patch('dice_app.checks.settings', DATABASES=databases):
+            warnings = check_persistent_connections(None)
+        self.assertEqual([warning.id for warning in warnings], ['dice_app.W001'])
+        self.assertIn('default', warnings[0].msg)
+
+
+class ImageDerivativesTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.name = self.save_image('game/image/test.png', 2000, 'PNG')
+
+    def save_image(self, name, width, image_format):
+        buffer = BytesIO()
+        Image.new('RGB', (width, width // 2), (255, 0, 0)).save(buffer, image_format)
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def test_generate_derivatives(self):
+        self.assertTrue(generate_derivatives(self.name))
+        for width in (320, 640, 1280):
+            for extension in ('webp', 'jpg'):
+                with default_storage.open(derivative_name(self.name, width, extension)) as file:
+                    self.assertEqual(Image.open(file).size, (width, width // 2))
+        self.assertEqual(get_derivative_widths(self.name), [320, 640, 1280])
+
+    def test_generate_derivatives_skips_missing_files(self):
+        with self.assertLogs('dice_app.images', 'WARNING'):
+            self.assertFalse(generate_derivatives('game/image/missing.png'))
+
+    def test_derivatives_keep_source_extension(self):
+        other = self.save_image('game/image/test.jpg', 2000, 'JPEG')
+        self.assertNotEqual(derivative_name(self.name, 640, 'jpg'), derivative_name(other, 640, 'jpg'))
+
+    def test_small_sources_are_not_upscaled(self):
+        name = self.save_image('game/image/small.png', 700, 'PNG')
+        self.assertTrue(generate_derivatives(name))
+        self.assertEqual(get_derivative_widths(name), [320, 640])
+        self.assertFalse(default_storage.exists(derivative_name(name, 1280, 'jpg')))
+
+    def test_responsive_image_tag(self):
+        template = Template("{% load images %}{% responsive_image image 'img-record' %}")
+        image = Game(image=self.name).image
+        self.assertNotIn('srcset', template.render(Context({'image': image})))
+        generate_derivatives(self.name)
+        with mock.patch.object(default_storage, 'exists') as exists:
+            html = template.render(Context({'image': image}))
+        exists.assert_not_called()
+        self.assertIn('game/image/resized/test.png_640.webp 640w', html)
+        self.assertIn('game/image/resized/test.png_1280.jpg 1280w', html)
+
+    def test_widths_are_read_from_storage_on_cache_miss(self):
+        template = Template("{% load images %}{% responsive_image image %}")
+        image = Game(image=self.name).image
+        generate_derivatives(self.name)
+        cache.clear()
+        self.assertIn('test.png_1280.jpg 1280w', template.render(Context({'image': image})))
+        with mock.patch.object(default_storage, 'exists') as exists:
+            self.assertIn('test.png_1280.jpg 1280w', template.render(Context({'image': image})))
+        exists.assert_not_called()
+
+    def test_existing_derivatives_are_recorded(self):
+        generate_derivatives(self.name)
+        cache.clear()
+        ensure_derivatives(self.name)
+        self.assertEqual(get_derivative_widths(self.name), [320, 640, 1280])
+
+
+class StaticBundleTest(SimpleTestCase):
+
+    def render_bundle(self, name):
+        return Template("{% load assets %}{% bundle name %}").render(Context({'name': name}))
+
+    def test_minify_css_keeps_strings(self):
+        self.assertEqual(minify_css('a  >  b { content: ", " ; color : red; } /* x */'), 'a>b{content:", ";color :red}')
+
+    @override_settings(STATIC_BUNDLES=False)
+    def test_debug_lists_sources(self):
+        html = self.render_bundle('css/site.bundle.css')
+        self.assertEqual(html.count('<link'), len(BUNDLES['css/site.bundle.css']))
+        self.assertIn('base_styles_mobile.css" media="screen and (max-width: 767px)"', html)
+
+    def test_collectstatic_builds_hashed_compressed_bundles(self):
+        storages = {**settings.STORAGES,
+                    'staticfiles': {'BACKEND': 'dice_app.storage.BundleManifestStaticFilesStorage'}}
+        with tempfile.TemporaryDirectory() as root, \
+                override_settings(STATIC_ROOT=root, STATIC_BUNDLES=True, STORAGES=storages):
+            with self.assertLogs('dice_app.storage', 'WARNING'):
+                call_command('collectstatic', interactive=False, verbosity=0)
+            self.assertRegex(self.render_bundle('css/site.bundle.css'),
+                             r'^<link rel="stylesheet" href="/dice_app/static/css/site\.bundle\.[0-9a-f]{12}\.css">$')
+            name = staticfiles_storage.stored_name('js/site.bundle.js')
+            self.assertTrue(os.path.exists(os.path.join(root, name + '.gz')))
+            with open(os.path.join(root, staticfiles_storage.stored_name('css/site.bundle.css'))) as file:
+                css = file.read()
+            self.assertIn('@media screen and (max-width: 767px){', css)
+            self.assertRegex(css, r'font/Veles\.[0-9a-f]{12}\.woff2')
+
+
+class AvatarCatalogTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name, MEDIA_URL='/uploads/')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for filename in ['elf.png', 'dwarf.png', 'notes.txt']:
+            default_storage.save('user/avatars/' + filename, ContentFile(b''))
+
+    def test_catalog_is_cached_until_folder_changes(self):
+        urls = ['/uploads/user/avatars/dwarf.png', '/uploads/user/avatars/elf.png']
+        self.assertEqual(get_avatar_urls(), urls)
+        with mock.patch('dice_app.avatars.build_avatar_catalog') as build:
+            self.assertEqual(get_avatar_urls(), urls)
+        build.assert_not_called()
+        default_storage.save('user/avatars/orc.png', ContentFile(b''))
+        os.utime(default_storage.path('user/avatars'), (time.time() + 10, time.time() + 10))
+        self.assertEqual(get_avatar_urls(), urls + ['/uploads/user/avatars/orc.png'])
+
+    def test_refresh_rebuilds_catalog(self):
+        urls = ['/uploads/user/avatars/dwarf.png', '/uploads/user/avatars/elf.png']
+        self.assertEqual(get_avatar_urls(), urls)
+        with mock.patch('dice_app.avatars.get_avatar_folder_mtime', return_value=None):
+            get_avatar_urls()
+            default_storage.save('user/avatars/orc.png', ContentFile(b''))
+            self.assertEqual(refresh_avatar_catalog(), urls + ['/uploads/user/avatars/orc.png'])
+
+
+class BenchmarkBudgetTest(TestCase):
+
+    def test_views_stay_within_query_budgets(self):
+        seed(cities=2, games=300)
+        cache.set('sentinel', 1)
+        results = run_benchmarks(seed_users(20), repeat=1)
+        self.assertEqual(check_budgets(results), [])
+        self.assertEqual(cache.get('sentinel'), 1)
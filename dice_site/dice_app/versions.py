@@ -0,0 +1,27 @@
+import time
+
+from django.core.cache import cache
+
+
+def get_model_version_key(model):
+    return 'model_version:%s' % model._meta.label_lower
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_versions(*keys):
+    cache.set_many({key: time.time_ns() for key in keys}, None)
+
+
+async def aget_version(key):
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
@@ -1,43 +1,61 @@
+import asyncio
 import datetime
-import os
+import hashlib
 from urllib.parse import unquote
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import BadRequest
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render, redirect
-from django.views.generic.base import TemplateView, ContextMixin
-from django.db.models import Count, Q
+from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control
+from django.utils.safestring import mark_safe
+from django.views.decorators.http import condition
+from django.views.generic.base import TemplateView, ContextMixin, View
 from django.contrib.auth import authenticate, login, logout, update_session_auth_hash
 
-from .models import Game, Profile, City
+from .models import Game, Booking
+from .api import RESOURCES
+from .avatars import get_avatar_urls
+from .backends import get_profile
+from .booking import book_game, cancel_booking
+from .cities import CITIES_VERSION_KEY, get_open_cities, get_city, get_default_city, aget_city, aget_default_city
 from .forms import CustomUserCreationForm, CustomAuthenticationForm, CustomUserForm, CustomProfileUserForm, \
-    AvatarChangeForm, ChangePasswordForm
+    AvatarChangeForm, ChangePasswordForm, CitySelectForm
+from .routers import replica_reads, render_with_replica_reads
+from .schedule import SCHEDULE_PAGE_SIZE, build_schedule, decode_cursor, get_schedule_games, get_schedule_page, \
+    aget_schedule_games, aget_day_counts, get_schedule_cache_key, aget_schedule_cache_key, get_schedule_stamp, \
+    get_schedule_version_key
+from .versions import get_version
 
 
 class CityMixin(ContextMixin):
     template_name = None
-    selected_city = City.objects.order_by('id').first()
+    selected_city = None
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['cities'] = City.objects.filter(close=False)
+        context['cities'] = get_open_cities().values()
         context['selected_city'] = self.selected_city
         return context
 
     def dispatch(self, request, *args, **kwargs):
-        selected_city_id = request.COOKIES.get('selected_city')
-        if selected_city_id:
-            self.selected_city = City.objects.get(pk=selected_city_id)
+        self.selected_city = get_city(request.COOKIES.get('selected_city')) or get_default_city()
         return super().dispatch(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
-        selected_city_id = request.POST.get('city_id')
-        if selected_city_id:
-            self.selected_city = City.objects.get(pk=selected_city_id)
-            response = self.render_to_response(self.get_context_data())
-            response.set_cookie('selected_city', selected_city_id)
-            return response
-        return super().post(request, *args, **kwargs)
+        if 'city_id' not in request.POST and hasattr(super(), 'post'):
+            return super().post(request, *args, **kwargs)
+        form_city = CitySelectForm(request.POST)
+        if not form_city.is_valid():
+            return self.render_to_response(self.get_context_data(form_city=form_city))
+        self.selected_city = form_city.cleaned_data['city_id']
+        response = self.render_to_response(self.get_context_data())
+        response.set_cookie('selected_city', self.selected_city.id)
+        return response
 
 
 class RegisterLoginMixin(ContextMixin):
@@ -49,12 +67,7 @@ class RegisterLoginMixin(ContextMixin):
         context = super().get_context_data(**kwargs)
         context['form_register'] = self.form_register
         context['form_login'] = self.form_login
-        if self.request.user.is_authenticated:
-            try:
-                profile = Profile.objects.get(user=self.request.user)
-                context['profile'] = profile
-            except Profile.DoesNotExist:
-                pass
+        context['profile'] = get_profile(self.request.user)
         return context
 
     def post(self, request, *args, **kwargs):
@@ -73,10 +86,9 @@ class RegisterLoginMixin(ContextMixin):
                                                         'form_login': self.form_login,
                                                         'show_login': True})
         elif 'register-btn' in request.POST:
-            if self.form_register.is_valid():
-                user = self.form_register.save()
-                Profile.objects.create(user=user)
-                login(request, user)
+            user = self.form_register.create_user() if self.form_register.is_valid() else None
+            if user is not None:
+                login(request, user, backend='dice_app.backends.ProfileModelBackend')
                 return self.get(request, *args, **kwargs)
             return render(request, self.template_name, {**context,
                                                         'form_register': self.form_register,
@@ -85,29 +97,155 @@ class RegisterLoginMixin(ContextMixin):
         return render(request, self.template_name, context)
 
 
-class RecordsView(TemplateView, CityMixin, RegisterLoginMixin):
-    template_name = 'record.html'
+class ScheduleMixin(ContextMixin):
+    paginate_by = SCHEDULE_PAGE_SIZE
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+    def get_games(self, search_query, free_only=False):
+        return get_schedule_games(self.selected_city, search_query, free_only)
 
+    def get_schedule_html(self):
+        if self.selected_city is None:
+            return ''
         search_query = self.request.GET.get('search_query', '').strip()
-        search_fields = ['name__icontains', 'description__icontains', 'system__system__icontains',
-                         'type_game__icontains', 'master__name__icontains', 'room__name__icontains',
-                         'room__address__address__icontains']
-        city_filter = Q(room__city__id__icontains=self.selected_city.id)
-        search_filter = Q()
-        for field in search_fields:
-            search_filter |= Q(**{field: search_query})
-        end_filter = city_filter & search_filter
-        context['games'] = Game.objects.filter(end_filter)
-        context['days'] = Game.objects.filter(
-            end_filter,
-            canceled=False,
-            date__gte=datetime.date.today()).values('date').annotate(count_game=Count('name', distinct=True)).order_by()
+        free_only = self.request.GET.get('free_seats') == '1'
+        cursor = self.request.GET.get('cursor')
+        key = get_schedule_cache_key(self.selected_city.id, self.request.user.is_authenticated, search_query, cursor,
+                                     free_only)
+        schedule_html = cache.get(key)
+        if schedule_html is None:
+            try:
+                schedule, next_cursor = get_schedule_page(self.get_games(search_query, free_only), cursor,
+                                                          self.paginate_by)
+            except ValueError:
+                raise BadRequest('Некорректный курсор.')
+            schedule_html = render_to_string('record_days.html', {'schedule': schedule,
+                                                                  'next_cursor': next_cursor,
+                                                                  'search_query': search_query,
+                                                                  'free_only': free_only}, self.request)
+            cache.set(key, schedule_html, settings.SCHEDULE_CACHE_TIMEOUT)
+        return mark_safe(schedule_html)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['schedule_html'] = self.get_schedule_html()
+        context['free_only'] = self.request.GET.get('free_seats') == '1'
         return context
 
 
+class ReplicaReadMixin:
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        with replica_reads():
+            return render_with_replica_reads(super().dispatch(request, *args, **kwargs))
+
+
+class RecordsView(ReplicaReadMixin, TemplateView, CityMixin, RegisterLoginMixin, ScheduleMixin):
+    template_name = 'record.html'
+
+    def get(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().get(request, *args, **kwargs)
+        response = condition(etag_func=self.get_etag)(super().get)(request, *args, **kwargs)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_etag(self, request, *args, **kwargs):
+        if self.selected_city is None:
+            return None
+        stamp = get_schedule_stamp(self.selected_city.id)
+        profile = get_profile(request.user)
+        parts = [self.selected_city.id, stamp['games'], stamp['game'], stamp['room'], stamp['master'],
+                 get_version(get_schedule_version_key(self.selected_city.id)), get_version(CITIES_VERSION_KEY),
+                 datetime.date.today(), request.user.pk, profile.avatars.name if profile else '',
+                 request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''), request.GET.urlencode()]
+        return hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest()
+
+
+class RecordsMoreView(View):
+    paginate_by = SCHEDULE_PAGE_SIZE
+
+    async def get(self, request):
+        with replica_reads():
+            return await self.get_schedule_response(request)
+
+    async def get_schedule_response(self, request):
+        selected_city = await aget_city(request.COOKIES.get('selected_city')) or await aget_default_city()
+        if selected_city is None:
+            return HttpResponse('')
+        search_query = request.GET.get('search_query', '').strip()
+        free_only = request.GET.get('free_seats') == '1'
+        cursor = request.GET.get('cursor')
+        is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+        key = await aget_schedule_cache_key(selected_city.id, is_authenticated, search_query, cursor, free_only)
+        schedule_html = await cache.aget(key)
+        if schedule_html is None:
+            schedule_html = await self.render_schedule(selected_city, search_query, cursor, free_only)
+            await cache.aset(key, schedule_html, settings.SCHEDULE_CACHE_TIMEOUT)
+        return HttpResponse(schedule_html)
+
+    async def render_schedule(self, selected_city, search_query, cursor, free_only=False):
+        games = get_schedule_games(selected_city, search_query, free_only)
+        try:
+            date_from = decode_cursor(cursor)[0] if cursor else datetime.date.today()
+            tasks = [aget_schedule_games(games, cursor, self.paginate_by)]
+            if not search_query and not free_only:
+                tasks.append(aget_day_counts(selected_city.id, date_from, self.paginate_by))
+            (page, next_cursor), *day_counts = await asyncio.gather(*tasks)
+        except ValueError:
+            raise BadRequest('Некорректный курсор.')
+        context = {'schedule': build_schedule(page, *day_counts),
+                   'next_cursor': next_cursor,
+                   'search_query': search_query,
+                   'free_only': free_only}
+        return await sync_to_async(render_to_string)('record_days.html', context, self.request)
+
+
+class ApiView(View):
+
+    def get(self, request, resource):
+        api_resource = RESOURCES.get(resource)
+        if api_resource is None:
+            raise Http404('Ресурс не найден.')
+        with replica_reads():
+            try:
+                page = api_resource.get_page(request.GET)
+            except ValueError as error:
+                return JsonResponse({'error': str(error)}, status=400)
+        response = HttpResponse(''.join(api_resource.serialize(*page)), content_type='application/json')
+        patch_cache_control(response, public=True, max_age=settings.API_CACHE_TIMEOUT)
+        return response
+
+
+class BookingView(LoginRequiredMixin, View):
+    raise_exception = True
+
+    def post(self, request, game_id):
+        profile = get_profile(request.user)
+        if profile is None:
+            raise Http404('Профиль не найден.')
+        try:
+            if 'cancel' in request.POST:
+                booking = cancel_booking(profile, game_id)
+            else:
+                booking = book_game(profile, game_id)
+        except (Game.DoesNotExist, Booking.DoesNotExist):
+            raise Http404('Игра не найдена.')
+        return JsonResponse({'status': booking.status, 'filled_seats': booking.game.filled_seats})
+
+
+class BookingStatusView(LoginRequiredMixin, View):
+    raise_exception = True
+
+    def get(self, request):
+        bookings = Booking.objects.filter(profile=get_profile(request.user), status__in=Booking.ACTIVE_STATUSES,
+                                          game__date__gte=datetime.date.today())
+        response = JsonResponse({str(game_id): status for game_id, status in bookings.values_list('game_id', 'status')})
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
 class ProfileView(TemplateView, LoginRequiredMixin, CityMixin):
     template_name = 'profile.html'
     form_avatar = AvatarChangeForm
@@ -116,24 +254,17 @@ class ProfileView(TemplateView, LoginRequiredMixin, CityMixin):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        profile = Profile.objects.get(user=self.request.user)
+        profile = get_profile(self.request.user)
         context['profile'] = profile
         context['form_change'] = self.form_change(instance=self.request.user)
         context['form_profile'] = self.form_profile(instance=profile)
 
-        avatars_list = []
-        avatar_folder_path = os.path.join(settings.MEDIA_ROOT, settings.AVATAR_FOLDER)
-
-        for filename in os.listdir(avatar_folder_path):
-            if filename.endswith('.png'):
-                avatar_url = os.path.join(settings.MEDIA_URL, settings.AVATAR_FOLDER, filename)
-                avatars_list.append(avatar_url)
-        context['avatars_list'] = avatars_list
+        context['avatars_list'] = get_avatar_urls()
         return context
 
     def post(self, request, *args, **kwargs):
         context = self.get_context_data(**kwargs)
-        profile = Profile.objects.get(user=request.user)
+        profile = context['profile']
         if 'logout-btn' in request.POST:
             logout(request)
             return redirect('records')
@@ -164,8 +295,7 @@ class ChangePasswordView(TemplateView, LoginRequiredMixin, CityMixin):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        profile = Profile.objects.get(user=self.request.user)
-        context['profile'] = profile
+        context['profile'] = get_profile(self.request.user)
         context['form'] = self.form_class(user=self.request.user)
         return context
 
@@ -12,5 +12,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dice_site.settings')
+os.environ.setdefault('CONN_MAX_AGE_DB', '0')
 
 application = get_asgi_application()
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -46,11 +47,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'dice_app.performance.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'dice_app.routers.ReplicaPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -81,6 +84,9 @@ WSGI_APPLICATION = 'dice_site.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+CONN_MAX_AGE = os.getenv('CONN_MAX_AGE_DB', '60')
+CONN_MAX_AGE = None if CONN_MAX_AGE.lower() == 'none' else int(CONN_MAX_AGE)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.' + os.getenv('ENGINE_DB'),
@@ -89,9 +95,49 @@ DATABASES = {
         'PASSWORD': os.getenv('PASSWORD_DB'),
         'HOST': os.getenv('HOST_DB'),
         'PORT': os.getenv('PORT_DB'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': os.getenv('CONN_HEALTH_CHECKS_DB', '1') == '1',
     }
 }
 
+if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+    DATABASES['default']['TEST'] = {
+        'NAME': os.getenv('TEST_NAME_DB', os.path.join(tempfile.gettempdir(), 'dice_test.sqlite3')),
+    }
+
+if os.getenv('REPLICA_HOST_DB') or os.getenv('REPLICA_NAME_DB'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('REPLICA_NAME_DB', DATABASES['default']['NAME']),
+        'USER': os.getenv('REPLICA_USER_DB', DATABASES['default']['USER']),
+        'PASSWORD': os.getenv('REPLICA_PASSWORD_DB', DATABASES['default']['PASSWORD']),
+        'HOST': os.getenv('REPLICA_HOST_DB', DATABASES['default']['HOST']),
+        'PORT': os.getenv('REPLICA_PORT_DB', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['dice_app.routers.ReplicaRouter']
+
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    },
+    'benchmark': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark',
+    },
+}
+
+SCHEDULE_CACHE_TIMEOUT = int(os.getenv('SCHEDULE_CACHE_TIMEOUT', 300))
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', 60))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -111,6 +157,17 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'dice_app.hashers.ConfigurablePBKDF2PasswordHasher')
+
+PASSWORD_HASHERS = [PASSWORD_HASHER] + [hasher for hasher in [
+    'dice_app.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+] if hasher != PASSWORD_HASHER]
+
+PASSWORD_ITERATIONS = int(os.getenv('PASSWORD_ITERATIONS', 0))
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -132,6 +189,20 @@ STATICFILES_DIRS = [
     BASE_DIR / 'dice_app/static',
 ]
 
+STATIC_ROOT = os.getenv('STATIC_ROOT', BASE_DIR / 'staticfiles')
+
+STATIC_BUNDLES = os.getenv('STATIC_BUNDLES', '') == '1'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': ('dice_app.storage.BundleManifestStaticFilesStorage' if STATIC_BUNDLES
+                    else 'django.contrib.staticfiles.storage.StaticFilesStorage'),
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -146,7 +217,16 @@ LOGIN_REDIRECT_URL = '/'
 AUTHENTICATION_FORM = 'dice_app.forms.CustomAuthenticationForm'
 
 AUTHENTICATION_BACKENDS = [
+    'dice_app.backends.ProfileModelBackend',
     'django.contrib.auth.backends.ModelBackend',
 ]
 
 AVATAR_FOLDER = 'user/avatars/'
+
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND')
+
+PERFORMANCE_INSTRUMENTATION = os.getenv('PERFORMANCE_INSTRUMENTATION')
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 365))
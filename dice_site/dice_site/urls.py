@@ -7,6 +7,10 @@ from django.conf.urls.static import static
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', views.RecordsView.as_view(), name='records'),
+    path('records/more/', views.RecordsMoreView.as_view(), name='records_more'),
+    path('api/v1/<slug:resource>/', views.ApiView.as_view(), name='api'),
+    path('games/<int:game_id>/booking/', views.BookingView.as_view(), name='booking'),
+    path('games/bookings/', views.BookingStatusView.as_view(), name='booking_statuses'),
     path('profile/', views.ProfileView.as_view(), name='profile'),
     path('profile/change_password/', views.ChangePasswordView.as_view(), name='change_password'),
 ]